@@ -0,0 +1,89 @@
+# Compares the per-row TaskManager mutators with their bulk variants.
+#
+#   python benchmarks/bench_bulk_writes.py --rows 10000
+#
+# Each run uses a fresh database in a temporary directory, so the numbers
+# include the real commit (fsync) cost of the disk the directory lives on.
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core import TaskManager, Priority
+
+
+def make_tasks(rows):
+    priorities = list(Priority)
+    categories = ["Work", "Personal", "Shopping", "Health", "Education"]
+    return [
+        {
+            "title": f"Task {i}",
+            "description": f"Benchmark task number {i}",
+            "priority": priorities[i % len(priorities)],
+            "category": categories[i % len(categories)]
+        }
+        for i in range(rows)
+    ]
+
+
+def make_updates(ids):
+    # A new title for every task, and a new priority for every other one
+    return [
+        (task_id, {"title": f"Edited task {i}", "priority": Priority.HIGH} if i % 2 else {"title": f"Edited task {i}"})
+        for i, task_id in enumerate(ids)
+    ]
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:8.3f} s")
+    return elapsed
+
+
+def run(rows, directory):
+    tasks = make_tasks(rows)
+    results = {}
+
+    # Per-row mutators, one commit each
+    manager = TaskManager(os.path.join(directory, "per_row.db"))
+    print(f"Per-row API ({rows} rows)")
+    ids = []
+    results["add"] = [timed("add_task", lambda: ids.extend(manager.add_task(**task) for task in tasks))]
+    updates = make_updates(ids)
+    results["update"] = [timed("update_task", lambda: [manager.update_task(i, **fields) for i, fields in updates])]
+    results["complete"] = [timed("complete_task", lambda: [manager.complete_task(i) for i in ids])]
+    results["delete"] = [timed("delete_task", lambda: [manager.delete_task(i) for i in ids])]
+    manager.conn.close()
+
+    # Bulk mutators, one transaction each
+    manager = TaskManager(os.path.join(directory, "bulk.db"))
+    print(f"Bulk API ({rows} rows)")
+    ids = []
+    results["add"].append(timed("add_tasks", lambda: ids.extend(manager.add_tasks(tasks))))
+    updates = make_updates(ids)
+    results["update"].append(timed("update_tasks", lambda: manager.update_tasks(updates)))
+    results["complete"].append(timed("complete_tasks", lambda: manager.complete_tasks(ids)))
+    results["delete"].append(timed("delete_tasks", lambda: manager.delete_tasks(ids)))
+    manager.conn.close()
+
+    print("Speedup")
+    for name, (per_row, bulk) in results.items():
+        print(f"  {name:<28} {per_row / bulk:8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk TaskManager writes")
+    parser.add_argument("--rows", type=int, default=10000, help="number of tasks to write")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        run(args.rows, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# Load test for todo_server.py against localhost.
+#
+#   python benchmarks/bench_server.py --clients 16 --requests 500 --rows 5000
+#   python benchmarks/bench_server.py --url http://127.0.0.1:8765   (a running server)
+#
+# Without --url a server is started on a free port over a fresh database with
+# --rows tasks. Each client keeps one keep-alive connection and sends a mix of
+# conditional list and stats reads, adds and completions; latency percentiles
+# are reported per request kind, along with the share of 304 responses.
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from todo_core import TaskManager, Priority
+
+# Request kind and its share of the mix
+MIX = [("list", 0.5), ("stats", 0.2), ("search", 0.1), ("add", 0.1), ("complete", 0.1)]
+
+
+class Client:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.etags = {}
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None, conditional=False):
+        content = b"" if body is None else json.dumps(body).encode()
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(content)}"]
+        if conditional and path in self.etags:
+            headers.append(f"If-None-Match: {self.etags[path]}")
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + content)
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "etag":
+                self.etags[path] = value.strip()
+        payload = json.loads(await self.reader.readexactly(length)) if length else None
+        return status, payload
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_client(client, requests, task_ids, latencies, statuses):
+    await client.connect()
+    kinds, weights = zip(*MIX)
+    for _ in range(requests):
+        kind = random.choices(kinds, weights)[0]
+        start = time.perf_counter()
+        if kind == "list":
+            status, _ = await client.request("GET", "/tasks?limit=50", conditional=True)
+        elif kind == "stats":
+            status, _ = await client.request("GET", "/stats", conditional=True)
+        elif kind == "search":
+            status, _ = await client.request("GET", f"/search?q=task+{random.randint(1, 99)}&limit=20", conditional=True)
+        elif kind == "add":
+            status, payload = await client.request("POST", "/tasks", {"title": "Load test task", "priority": "high"})
+            task_ids.extend(payload["ids"])
+        else:
+            status, _ = await client.request("POST", f"/tasks/{random.choice(task_ids)}/complete")
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    client.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def populate(path, rows):
+    manager = TaskManager(path)
+    priorities = list(Priority)
+    task_ids = manager.add_tasks(
+        {"title": f"Task {i}", "description": f"Load test task {i}", "priority": priorities[i % len(priorities)]}
+        for i in range(rows)
+    )
+    manager.close()
+    return task_ids
+
+
+async def load(host, port, clients, requests, task_ids):
+    latencies = {}
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(Client(host, port), requests, task_ids, latencies, statuses)
+        for _ in range(clients)
+    ))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def report(elapsed, latencies, statuses):
+    total = sum(statuses.values())
+    print(f"{total} requests in {elapsed:.2f} s: {total / elapsed:.0f} requests/s")
+    print(f"  statuses: {dict(sorted(statuses.items()))}, 304 share {statuses.get(304, 0) / total:.0%}")
+    print(f"  {'kind':<10} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind, times in sorted(latencies.items()):
+        times = sorted(times)
+        percentile = lambda p: times[min(len(times) - 1, int(p * len(times)))] * 1000
+        print(f"  {kind:<10} {len(times):>6} {statistics.median(times) * 1000:8.2f} {percentile(0.95):8.2f} {percentile(0.99):8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local todo HTTP server")
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--rows", type=int, default=5000, help="tasks in the fresh database")
+    parser.add_argument("--readers", type=int, default=4, help="reader connections of the started server")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        client = Client(url.hostname, url.port)
+
+        async def existing_ids():
+            await client.connect()
+            _, payload = await client.request("GET", "/tasks?limit=1000")
+            client.close()
+            return [task["id"] for task in payload["tasks"]] or [0]
+
+        task_ids = asyncio.run(existing_ids())
+        report(*asyncio.run(load(url.hostname, url.port, args.clients, args.requests, task_ids)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "server.db")
+        task_ids = populate(path, args.rows)
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "todo_server.py"), "--db", path,
+             "--port", str(port), "--readers", str(args.readers)],
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_server("127.0.0.1", port)
+            report(*asyncio.run(load("127.0.0.1", port, args.clients, args.requests, task_ids)))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
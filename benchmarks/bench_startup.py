@@ -0,0 +1,121 @@
+# Measures startup: module import time (from -X importtime) and the time until
+# the first task card is on screen.
+#
+#   python benchmarks/bench_startup.py --rows 1000 --runs 5
+#
+# Every run is a fresh interpreter started with -X importtime against the same
+# database, so the numbers include interpreter startup and a cold import of
+# every module. The first-card measurement needs a display; without one only
+# the headless core import is measured.
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from todo_core import TaskManager, Priority
+
+# Imports reported separately when they show up in the import log
+WATCHED_MODULES = ["todo_core", "todo", "customtkinter", "tkinter", "tkcalendar", "PIL"]
+
+CORE_SCRIPT = '''
+import sys
+import todo_core
+manager = todo_core.TaskManager(sys.argv[1])
+manager.get_tasks_page()
+print("tkinter" in sys.modules)
+'''
+
+APP_SCRIPT = '''
+import sys
+import time
+start = time.perf_counter()
+import todo_core
+todo_core.DEFAULT_DB_PATH = sys.argv[1]
+import todo
+app = todo.ModernTodoApp()
+while not any(card.winfo_ismapped() for card in app.task_cards.values()):
+    app.update()
+print(time.perf_counter() - start)
+app.on_close()
+'''
+
+
+def populate(path, rows):
+    manager = TaskManager(path)
+    priorities = list(Priority)
+    manager.add_tasks(
+        {"title": f"Task {i}", "description": f"Startup task {i}", "priority": priorities[i % len(priorities)]}
+        for i in range(rows)
+    )
+    manager.close()
+
+
+def parse_importtime(log):
+    # Cumulative microseconds per watched module, from lines like
+    # "import time:       163 |        940 |   customtkinter"
+    times = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if name in WATCHED_MODULES and cumulative.strip().isdigit():
+            times[name] = int(cumulative)
+    return times
+
+
+def run(script, path):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script, path],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return wall, result.stdout.strip(), parse_importtime(result.stderr)
+
+
+def report(name, runs):
+    walls = [wall for wall, _, _ in runs]
+    print(f"{name}: {statistics.median(walls) * 1000:.1f} ms wall (median of {len(runs)})")
+    for module in WATCHED_MODULES:
+        times = [imports[module] for _, _, imports in runs if module in imports]
+        if times:
+            print(f"  import {module:<14} {statistics.median(times) / 1000:8.1f} ms")
+        else:
+            print(f"  import {module:<14} {'not loaded':>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time and time to the first task card")
+    parser.add_argument("--rows", type=int, default=1000, help="number of tasks in the database")
+    parser.add_argument("--runs", type=int, default=5, help="interpreter starts per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "startup.db")
+        populate(path, args.rows)
+
+        core_runs = [run(CORE_SCRIPT, path) for _ in range(args.runs)]
+        report("core (open database, first page)", core_runs)
+        print(f"  tkinter imported: {core_runs[0][1]}")
+
+        try:
+            app_runs = [run(APP_SCRIPT, path) for _ in range(args.runs)]
+        except RuntimeError as error:
+            print(f"app: skipped ({error})")
+            return
+        report("app (first card on screen)", app_runs)
+        first_card = [float(output) for _, output, _ in app_runs]
+        print(f"  first card after {statistics.median(first_card) * 1000:.1f} ms in the process")
+
+
+if __name__ == "__main__":
+    main()
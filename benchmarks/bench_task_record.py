@@ -0,0 +1,101 @@
+# Measures the memory and CPU cost of plain row tuples versus Task records.
+#
+#   python benchmarks/bench_task_record.py --rows 100000
+#
+# Memory is the traced allocation of the fetched result set. CPU covers the
+# fetch plus two "renders" that each need the parsed due date and the overdue
+# check, the way TaskCard.set_task does on every refresh.
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core import TaskManager, Task, TASK_COLUMNS, Priority
+
+RENDERS = 3
+
+
+def populate(manager, rows):
+    now = datetime.datetime.now()
+    priorities = list(Priority)
+    manager.add_tasks(
+        {
+            "title": f"Task {i}",
+            "description": f"Benchmark task number {i}",
+            "due_date": now + datetime.timedelta(hours=random.randint(-500, 500)) if i % 4 else None,
+            "priority": priorities[i % len(priorities)]
+        }
+        for i in range(rows)
+    )
+
+
+def render_tuples(rows):
+    # What TaskCard did before Task records: convert and compare on every render
+    overdue = 0
+    for row in rows:
+        task_id, title, desc, created, due, completed, priority, category = row
+        if due:
+            due_date = datetime.datetime.fromtimestamp(due / 1000)
+            due_date.strftime("%Y-%m-%d %H:%M")
+            if not completed and due_date < datetime.datetime.now():
+                overdue += 1
+    return overdue
+
+
+def render_records(rows):
+    overdue = 0
+    for task in rows:
+        if task.due:
+            task.due.strftime("%Y-%m-%d %H:%M")
+            if task.is_overdue:
+                overdue += 1
+    return overdue
+
+
+def measure(manager, row_factory, render):
+    cursor = manager.conn.cursor()
+    cursor.row_factory = row_factory
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    cursor.execute(f"SELECT {TASK_COLUMNS} FROM tasks t JOIN categories c ON t.category_id = c.id")
+    rows = cursor.fetchall()
+    fetched = time.perf_counter()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    for _ in range(RENDERS):
+        render(rows)
+    rendered = time.perf_counter()
+    return memory, fetched - start, rendered - fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Task records against row tuples")
+    parser.add_argument("--rows", type=int, default=100000, help="number of tasks to fetch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = TaskManager(os.path.join(directory, "records.db"), profile="fast")
+        populate(manager, args.rows)
+
+        results = {
+            "tuple": measure(manager, None, render_tuples),
+            "Task": measure(manager, Task.from_row, render_records)
+        }
+        manager.conn.close()
+
+    print(f"{args.rows} rows, {RENDERS} renders")
+    print(f"  {'':<8} {'memory':>12} {'fetch':>10} {'render':>10}")
+    for name, (memory, fetch, render) in results.items():
+        print(f"  {name:<8} {memory / 1024 / 1024:9.1f} MiB {fetch:8.3f} s {render:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
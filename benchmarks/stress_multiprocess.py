@@ -0,0 +1,150 @@
+# Stress test for several processes sharing one database file, like two app
+# windows plus a script or the HTTP server.
+#
+#   python benchmarks/stress_multiprocess.py --processes 4 --ops 500
+#
+# Every writer process runs a random mix of single-task adds, edits,
+# completions and deletes plus the occasional import of IMPORT_SIZE tasks,
+# each its own transaction. A watcher process follows
+# the change log with get_changes, the way the app notices other windows'
+# writes, and keeps a copy of every task from the changed rows only. The run
+# passes when no write failed with "database is locked", the watcher's copy
+# equals the final table contents and the counters check out.
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core import TaskManager, Priority
+
+# Seconds between watcher polls
+POLL_INTERVAL = 0.02
+
+# Tasks added by one import, which holds the write lock a while
+IMPORT_SIZE = 200
+
+
+def writer(path, profile, ops, seed, results):
+    random.seed(seed)
+    manager = TaskManager(path, profile)
+    own_ids = []
+    latencies = []
+    errors = 0
+    for i in range(ops):
+        kind = random.choices(["add", "update", "complete", "delete", "import"], [40, 30, 20, 10, 1])[0]
+        start = time.perf_counter()
+        try:
+            if kind == "add" or not own_ids:
+                own_ids.append(manager.add_task(
+                    f"Task {seed}-{i}",
+                    priority=random.choice(list(Priority)),
+                    category=random.choice(["Work", "Personal", f"Process {seed}"])
+                ))
+            elif kind == "import":
+                own_ids.extend(manager.add_tasks(
+                    {"title": f"Imported {seed}-{i}-{j}", "category": "Imported"}
+                    for j in range(IMPORT_SIZE)
+                ))
+            elif kind == "update":
+                manager.update_task(random.choice(own_ids), title=f"Edited {seed}-{i}")
+            elif kind == "complete":
+                manager.complete_task(random.choice(own_ids))
+            else:
+                manager.delete_task(own_ids.pop(random.randrange(len(own_ids))))
+        except sqlite3.OperationalError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    manager.close()
+    results.put(("writer", latencies, errors))
+
+
+def watcher(path, profile, stop, results):
+    manager = TaskManager(path, profile)
+    revision = 0
+    mirror = {}
+    polls = reloads = rows_fetched = 0
+    while True:
+        done = stop.is_set()
+        polls += 1
+        revision, changes = manager.get_changes(revision)
+        if changes is None:
+            reloads += 1
+            mirror = {task.id: task for task in manager.get_all_tasks(include_completed=True)}
+        elif changes:
+            tasks = manager.get_tasks(changes)
+            rows_fetched += len(tasks)
+            for task_id in changes:
+                mirror.pop(task_id, None)
+            mirror.update((task.id, task) for task in tasks)
+        # One last poll after the writers finished
+        if done:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    actual = {task.id: task for task in manager.get_all_tasks(include_completed=True)}
+    results.put(("watcher", mirror == actual, polls, reloads, rows_fetched, len(actual)))
+    manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress one database file from several processes")
+    parser.add_argument("--processes", type=int, default=4, help="writer processes")
+    parser.add_argument("--ops", type=int, default=500, help="writes per process")
+    parser.add_argument("--profile", default="balanced", help="storage profile: durable, balanced or fast")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stress.db")
+        TaskManager(path, args.profile).close()
+
+        results = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        watch = multiprocessing.Process(target=watcher, args=(path, args.profile, stop, results))
+        watch.start()
+        writers = [
+            multiprocessing.Process(target=writer, args=(path, args.profile, args.ops, seed, results))
+            for seed in range(args.processes)
+        ]
+        start = time.perf_counter()
+        for process in writers:
+            process.start()
+
+        # Drain the queue before joining, a child can't exit with unread results
+        latencies = []
+        errors = 0
+        for _ in writers:
+            _, process_latencies, process_errors = results.get()
+            latencies.extend(process_latencies)
+            errors += process_errors
+        elapsed = time.perf_counter() - start
+        stop.set()
+        _, consistent, polls, reloads, rows_fetched, tasks = results.get()
+        for process in writers + [watch]:
+            process.join()
+
+        manager = TaskManager(path, args.profile)
+        counter_differences = manager.check_counters()
+        manager.close()
+
+    latencies.sort()
+    print(f"{len(latencies)} writes from {args.processes} processes in {elapsed:.2f} s: {len(latencies) / elapsed:.0f} writes/s")
+    print(f"  latency p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {latencies[int(0.99 * (len(latencies) - 1))] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    print(f"  locked errors: {errors}")
+    print(f"  watcher: {polls} polls, {rows_fetched} changed rows fetched, {reloads} full reloads, "
+          f"{tasks} tasks, copy {'matches' if consistent else 'DIFFERS from'} the database")
+    print(f"  counters: {'consistent' if not counter_differences else counter_differences}")
+    if errors or not consistent or counter_differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# The change log other processes follow with get_changes: every write to a
+# task shows up once, and tasks moving into or out of the archive are updates
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core import TaskManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = TaskManager(str(tmp_path / "changes.db"))
+    yield manager
+    manager.close()
+
+
+def logged(manager, since):
+    manager.cursor.execute("SELECT task_id, kind FROM task_changes WHERE seq > ? ORDER BY seq", (since,))
+    return manager.cursor.fetchall()
+
+
+def test_writes_are_logged(manager):
+    task_id = manager.add_task("Write report")
+    manager.update_task(task_id, title="Write the report")
+    manager.delete_task(task_id)
+    assert logged(manager, 0) == [(task_id, "insert"), (task_id, "update"), (task_id, "delete")]
+    assert manager.get_changes(0) == (3, {task_id: "delete"})
+
+
+def test_archive_and_restore_are_updates(manager):
+    kept, archived = manager.add_tasks([{"title": "Kept"}, {"title": "Archived"}])
+    manager.complete_task(archived)
+    revision = manager.get_revision()
+    assert manager.archive_completed(older_than_days=-1) == 1
+    assert logged(manager, revision) == [(archived, "update")]
+    assert manager.get_changes(revision) == (revision + 1, {archived: "update"})
+
+    revision = manager.get_revision()
+    assert manager.uncomplete_task(archived)
+    assert logged(manager, revision) == [(archived, "update")]
+    assert [task.id for task in manager.get_tasks([archived])] == [archived]
+
+    # Deleting from the archive is still a delete
+    manager.complete_task(archived)
+    manager.archive_completed(older_than_days=-1)
+    revision = manager.get_revision()
+    manager.delete_task(archived)
+    assert logged(manager, revision) == [(archived, "delete")]
+
+
+def test_other_connections_see_changes(manager, tmp_path):
+    other = TaskManager(str(tmp_path / "changes.db"))
+    try:
+        revision = other.get_revision()
+        assert other.get_changes(revision) == (revision, {})
+        task_id = manager.add_task("From another process")
+        assert other.get_changes(revision) == (revision + 1, {task_id: "insert"})
+    finally:
+        other.close()
+
+
+def test_pruned_log_asks_for_reload(manager):
+    first = manager.add_task("Old")
+    manager.add_task("New")
+    time.sleep(0.002)
+    assert manager.prune_changes(older_than_days=0) == 1
+    assert manager.get_changes(0) == (2, None)
+    assert manager.get_changes(1) == (2, {first + 1: "insert"})
+
+
+def test_version_7_triggers_are_replaced(tmp_path):
+    # A database from before archive moves were logged as updates
+    path = str(tmp_path / "old.db")
+    manager = TaskManager(path)
+    manager.cursor.execute("DROP TRIGGER tasks_changes_delete")
+    manager.cursor.execute('''
+    CREATE TRIGGER tasks_changes_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO task_changes (task_id, kind, changed_at) VALUES (old.id, 'delete', 0);
+    END
+    ''')
+    manager.cursor.execute("PRAGMA user_version = 7")
+    manager.conn.commit()
+    manager.close()
+
+    manager = TaskManager(path)
+    try:
+        assert manager.conn.execute("PRAGMA user_version").fetchone()[0] == 8
+        task_id = manager.add_task("Archived")
+        manager.complete_task(task_id)
+        revision = manager.get_revision()
+        manager.archive_completed(older_than_days=-1)
+        assert logged(manager, revision) == [(task_id, "update")]
+    finally:
+        manager.close()
+
+
+def test_log_prunes_itself(manager):
+    # Every CHANGE_LOG_PRUNE_EVERY-th logged change prunes, whoever writes it
+    manager.CHANGE_LOG_PRUNE_EVERY = 10
+    manager.CHANGE_LOG_DAYS = 0
+    for i in range(9):
+        manager.add_task(f"Task {i}")
+    assert len(logged(manager, 0)) == 9
+    time.sleep(0.002)
+    last = manager.add_task("Task 9")
+    assert logged(manager, 0) == [(last, "insert")]
+    assert manager.get_revision() == 10
+    assert manager.get_changes(0) == (10, None)
+    assert manager.get_changes(9) == (10, {last: "insert"})
@@ -0,0 +1,34 @@
+# Argument handling of todo_cli
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_cli import main
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "cli.db")
+    for title in ("Task one", "Task two", "Task three"):
+        assert main(["--db", path, "add", title]) == 0
+    return path
+
+
+@pytest.mark.parametrize("command", [["list"], ["search", "task"]])
+def test_limit(db, capsys, command):
+    capsys.readouterr()
+    assert main(["--db", db, *command, "--limit", "2"]) == 0
+    assert len([json.loads(line) for line in capsys.readouterr().out.splitlines()]) == 2
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "many"])
+@pytest.mark.parametrize("command", [["list"], ["search", "task"]])
+def test_limit_must_be_positive(db, capsys, command, limit):
+    with pytest.raises(SystemExit) as exit:
+        main(["--db", db, *command, "--limit", limit])
+    assert exit.value.code == 2
+    assert "--limit" in capsys.readouterr().err
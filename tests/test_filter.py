@@ -0,0 +1,209 @@
+# Filter expressions: parse_filter's terms, filter_tasks' results against a
+# plain Python reference, and the query plans compile_filter produces. Every
+# database test runs twice, with the FTS5 index and with the LIKE fallback.
+import os
+import sys
+import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import todo_core
+from todo_core import (
+    TaskManager, Priority, FilterError, TextFilter, PriorityFilter, CategoryFilter,
+    DueFilter, StatusFilter, parse_filter, compile_filter, list_order_key, to_epoch_ms, now_epoch_ms
+)
+
+NOW = datetime.datetime.now()
+TODAY = NOW.date()
+
+TASKS = 3000
+CATEGORIES = ["Work", "Personal", "Health"]
+
+
+def due_at(days):
+    # Noon, so the tasks due today are overdue the same in the query and the reference
+    return datetime.datetime.combine(TODAY + datetime.timedelta(days=days), datetime.time(12))
+
+
+def day_bounds(day):
+    start = datetime.datetime.combine(day, datetime.time.min)
+    return to_epoch_ms(start), to_epoch_ms(start + datetime.timedelta(days=1))
+
+
+@pytest.fixture(scope="module", params=["fts", "like"])
+def manager(request, tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        if request.param == "like":
+            monkeypatch.setattr(todo_core, "has_fts5", lambda cursor: False)
+        manager = TaskManager(str(tmp_path_factory.mktemp(request.param) / "filter.db"))
+    assert manager.has_fts == (request.param == "fts")
+
+    # Mostly finished tasks, like a database in use for a while: a third of
+    # them archived, due dates from three weeks ago to six weeks ahead
+    priorities = list(Priority)
+    ids = manager.add_tasks(
+        {
+            "title": f"Task {i}" + (" budget" if i % 50 == 0 else ""),
+            "description": "Re: budget review" if i % 70 == 0 else f"Details {i}",
+            "priority": priorities[i % len(priorities)],
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "due_date": None if i % 5 == 0 else due_at(i % 61 - 20)
+        }
+        for i in range(TASKS)
+    )
+    with manager.transaction():
+        for task_id in ids[:1000]:
+            manager.complete_task(task_id)
+    # A negative age archives tasks completed this very millisecond too
+    assert manager.archive_completed(older_than_days=-1) == 1000
+    with manager.transaction():
+        for task_id in ids[1000:2500]:
+            manager.complete_task(task_id)
+    yield manager
+    manager.close()
+
+
+def all_tasks(manager):
+    # Live and archived tasks alike
+    return manager.get_tasks(range(1, TASKS + 1))
+
+
+# Expression and the reference predicate of the tasks it matches
+def due_day(task):
+    return task.due.date() if task.due_date is not None else None
+
+
+def has_text(task, text):
+    return text in task.title.lower() or text in (task.description or "").lower()
+
+
+CASES = [
+    ("priority:high", lambda t: t.priority == Priority.HIGH.value),
+    ("priority:>=high", lambda t: t.priority >= Priority.HIGH.value),
+    ("priority:<medium", lambda t: t.priority < Priority.MEDIUM.value),
+    ("priority:low,critical", lambda t: t.priority in (1, 4)),
+    ("-priority:high", lambda t: t.priority != Priority.HIGH.value),
+    ("category:work", lambda t: t.category == "Work"),
+    ("category:Work,Health", lambda t: t.category in ("Work", "Health")),
+    ("-category:Work", lambda t: t.category != "Work"),
+    ("due:today", lambda t: due_day(t) == TODAY),
+    ("due:<+3d", lambda t: t.due_date is not None and due_day(t) < TODAY + datetime.timedelta(days=3)),
+    ("due:>=tomorrow", lambda t: t.due_date is not None and due_day(t) >= TODAY + datetime.timedelta(days=1)),
+    ("due:none", lambda t: t.due_date is None),
+    ("-due:today", lambda t: due_day(t) != TODAY),
+    ("is:open", lambda t: not t.is_completed),
+    ("is:done", lambda t: t.is_completed),
+    ("-is:done", lambda t: not t.is_completed),
+    ("is:overdue", lambda t: not t.is_completed and t.due_date is not None and t.due_date < now_epoch_ms()),
+    ("budget", lambda t: has_text(t, "budget")),
+    ("-budget", lambda t: not has_text(t, "budget")),
+    ("budget priority:high", lambda t: has_text(t, "budget") and t.priority == Priority.HIGH.value),
+    ("is:open category:Health due:<today", lambda t: (
+        not t.is_completed and t.category == "Health" and t.due_date is not None and due_day(t) < TODAY
+    )),
+    ("Re: budget", lambda t: has_text(t, "re: budget")),
+]
+
+
+@pytest.mark.parametrize("expression,matches", CASES, ids=[case[0] for case in CASES])
+@pytest.mark.parametrize("include_completed", [True, False], ids=["completed", "open"])
+def test_filter_tasks_matches_reference(manager, expression, matches, include_completed):
+    terms = parse_filter(expression)
+    picks_status = any(isinstance(term, StatusFilter) for term in terms)
+    expected = {
+        task.id for task in all_tasks(manager)
+        if matches(task) and (include_completed or picks_status or not task.is_completed)
+    }
+    assert {task.id for task in manager.filter_tasks(expression, include_completed)} == expected
+
+
+def test_filter_tasks_finds_something(manager):
+    # Guards the reference test against a dataset where every case is empty
+    for expression, _ in CASES:
+        assert manager.filter_tasks(expression), expression
+
+
+def test_text_results_order(manager):
+    # Ranked by bm25 with FTS5, in list order without it; never twice
+    tasks = manager.filter_tasks("budget")
+    assert len(tasks) == len({task.id for task in tasks})
+    if not manager.has_fts:
+        keys = [list_order_key(task)[:3] for task in manager.filter_tasks("budget", include_completed=False)]
+        assert keys == sorted(keys)
+
+
+# Expression and what the plan must show for the tasks table t
+PLANS = [
+    ("priority:high", "SEARCH t USING INDEX"),
+    ("priority:>=high", "SEARCH t USING INDEX"),
+    ("category:Work", "SEARCH t USING INDEX idx_tasks_category"),
+    ("due:today", "SEARCH t USING INDEX idx_tasks_"),
+    ("due:none", "SEARCH t USING INDEX idx_tasks_"),
+    ("is:open", "USING INDEX idx_tasks_open_order"),
+    ("is:overdue", "USING INDEX idx_tasks_open_order"),
+]
+
+
+def query_plan(manager, query, parameters):
+    manager.cursor.execute("EXPLAIN QUERY PLAN " + query, parameters)
+    return [row[3] for row in manager.cursor.fetchall()]
+
+
+@pytest.mark.parametrize("expression,expected", PLANS, ids=[plan[0] for plan in PLANS])
+@pytest.mark.parametrize("include_completed", [True, False], ids=["completed", "open"])
+def test_filter_uses_indexes(manager, expression, expected, include_completed):
+    plan = query_plan(manager, *compile_filter(parse_filter(expression), include_completed, manager.has_fts))
+    assert any(expected in step for step in plan), plan
+
+
+@pytest.mark.parametrize("expression", [case[0] for case in CASES])
+def test_filter_never_scans_tasks_without_an_index(manager, expression):
+    # A scan of the tasks table is only fine along a list order index, which
+    # saves the sort
+    plan = query_plan(manager, *compile_filter(parse_filter(expression), False, manager.has_fts))
+    for step in plan:
+        if step.startswith("SCAN t "):
+            assert "USING INDEX idx_tasks_" in step, plan
+
+
+def test_text_uses_fts_index(manager):
+    plan = query_plan(manager, *compile_filter(parse_filter("budget priority:high"), True, manager.has_fts))
+    if manager.has_fts:
+        assert any("VIRTUAL TABLE INDEX" in step for step in plan), plan
+        assert "SEARCH t USING INTEGER PRIMARY KEY (rowid=?)" in plan
+    else:
+        assert not any("VIRTUAL TABLE" in step for step in plan), plan
+        assert "SEARCH t USING INDEX idx_tasks_order (priority=?)" in plan
+
+
+def test_parse_filter_terms():
+    start, end = day_bounds(TODAY)
+    assert parse_filter("priority:high -category:Work,Health due:today is:completed report", NOW) == [
+        PriorityFilter("=", (Priority.HIGH.value,), False),
+        CategoryFilter(("Work", "Health"), True),
+        DueFilter(start, end, False),
+        StatusFilter("done", False),
+        TextFilter("report", False)
+    ]
+    assert parse_filter("priority:<=2", NOW) == [PriorityFilter("<=", (2,), False)]
+    assert parse_filter("due:none", NOW) == [DueFilter(None, None, False)]
+    assert parse_filter("due:>=2024-05-01", NOW) == [DueFilter(day_bounds(datetime.date(2024, 5, 1))[0], None, False)]
+    assert parse_filter("due:<+1w", NOW) == [DueFilter(None, day_bounds(TODAY + datetime.timedelta(days=7))[0], False)]
+    assert parse_filter('category:"Side project"', NOW) == [CategoryFilter(("Side project",), False)]
+    assert parse_filter('"quoted phrase" -', NOW) == [TextFilter('"quoted phrase"', False)]
+
+
+def test_unknown_fields_are_text():
+    assert parse_filter("Re: budget", NOW) == [TextFilter("re:", False), TextFilter("budget", False)]
+    assert parse_filter("http://example.com/a", NOW) == [TextFilter("http://example.com/a", False)]
+    assert parse_filter("-at:10", NOW) == [TextFilter("at:10", True)]
+
+
+@pytest.mark.parametrize("expression", [
+    "priority:", "priority:urgent", "priority:>=low,high", "category:", "due:someday", "due:", "is:maybe"
+])
+def test_parse_filter_errors(expression):
+    with pytest.raises(FilterError):
+        parse_filter(expression, NOW)
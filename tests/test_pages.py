@@ -0,0 +1,49 @@
+# Keyset pages of get_tasks_page and the list order their cursors stand for
+import os
+import sys
+import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core import TaskManager, Priority, list_order_key, page_cursor_key
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = TaskManager(str(tmp_path / "pages.db"))
+    now = datetime.datetime.now()
+    priorities = list(Priority)
+    task_ids = manager.add_tasks(
+        {
+            "title": f"Task {i}",
+            "priority": priorities[i % len(priorities)],
+            "due_date": None if i % 3 == 0 else now + datetime.timedelta(days=i % 7)
+        }
+        for i in range(100)
+    )
+    manager.complete_tasks(task_ids[:10])
+    manager.archive_completed(older_than_days=-1)
+    yield manager
+    manager.close()
+
+
+@pytest.mark.parametrize("include_completed", [True, False], ids=["completed", "open"])
+def test_pages_cover_the_list_once(manager, include_completed):
+    rows, cursor = manager.get_tasks_page(include_completed, limit=7)
+    while cursor is not None:
+        page, cursor = manager.get_tasks_page(include_completed, cursor, limit=7)
+        rows += page
+    assert len(rows) == (100 if include_completed else 90)
+    assert len({task.id for task in rows}) == len(rows)
+    live = [task for task in rows if not task.is_completed]
+    assert live == sorted(live, key=list_order_key)
+
+
+def test_cursor_key_is_the_last_row_key(manager):
+    rows, cursor = manager.get_tasks_page(limit=7)
+    while cursor is not None:
+        assert page_cursor_key(cursor) == list_order_key(rows[-1])
+        rows, cursor = manager.get_tasks_page(after=cursor, limit=7)
+    assert page_cursor_key(("archive", 0, 1)) is None
@@ -0,0 +1,28 @@
+# TaskManagerPool: calls run on the writer and reader connections, and
+# shutdown closes every connection on its own thread
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import todo_core
+from todo_core import TaskManagerPool
+
+
+def test_shutdown_closes_every_connection(tmp_path, monkeypatch):
+    closed = []
+    close = todo_core.TaskManager.close
+
+    def record_close(manager):
+        closed.append(threading.current_thread().name)
+        close(manager)
+
+    monkeypatch.setattr(todo_core.TaskManager, "close", record_close)
+    pool = TaskManagerPool(str(tmp_path / "pool.db"), readers=3)
+    task_id = pool.submit_write("add_task", "Pooled").result()
+    assert [pool.submit_read("get_task", task_id) for _ in range(10)][-1].result().title == "Pooled"
+    pool.shutdown()
+
+    assert len(closed) == 4 and len(set(closed)) == 4
+    assert sum(name.startswith("todo-db-reader") for name in closed) == 3
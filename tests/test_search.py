@@ -0,0 +1,54 @@
+# search_tasks and search_snippets over live and archived tasks, with the
+# FTS5 index and with the LIKE fallback
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import todo_core
+from todo_core import TaskManager
+
+
+@pytest.fixture(params=["fts", "like"])
+def manager(request, tmp_path, monkeypatch):
+    if request.param == "like":
+        monkeypatch.setattr(todo_core, "has_fts5", lambda cursor: False)
+    manager = TaskManager(str(tmp_path / "search.db"))
+    assert manager.has_fts == (request.param == "fts")
+
+    # Budget 0-2 archived, Budget 3-4 open, plus one task that doesn't match
+    ids = manager.add_tasks(
+        {"title": f"Budget {i}", "description": "Quarterly budget numbers"} for i in range(5)
+    )
+    manager.add_task("Groceries", "Milk and eggs")
+    for task_id in ids[:3]:
+        manager.complete_task(task_id)
+    assert manager.archive_completed(older_than_days=-1) == 3
+    yield manager
+    manager.close()
+
+
+def test_search_tasks_includes_archive(manager):
+    assert {task.id for task in manager.search_tasks("budget")[:2]} == {4, 5}
+    assert {task.id for task in manager.search_tasks("budget")} == {1, 2, 3, 4, 5}
+    assert {task.id for task in manager.search_tasks("budget", include_completed=False)} == {4, 5}
+
+
+def test_search_snippets_includes_archive(manager):
+    # Live matches first, then the archive, up to limit
+    snippets = manager.search_snippets("budget", limit=4)
+    assert {task_id for task_id, _, _ in snippets[:2]} == {4, 5}
+    assert len(snippets) == 4
+    assert {task_id for task_id, _, _ in manager.search_snippets("budget")} == {1, 2, 3, 4, 5}
+    assert manager.search_snippets("budget", limit=2) == snippets[:2]
+
+
+def test_search_snippets_highlight(manager):
+    task_id, title, snippet = manager.search_snippets("groceries", start="<b>", end="</b>")[0]
+    assert task_id == 6
+    if manager.has_fts:
+        assert title == "<b>Groceries</b>"
+    else:
+        assert (title, snippet) == ("Groceries", "Milk and eggs")
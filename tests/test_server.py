@@ -0,0 +1,108 @@
+# Request handling of todo_server, without a socket: dispatch() over a real
+# connection pool and database
+import os
+import sys
+import json
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from todo_core import TaskManager
+from todo_server import ConnectionPool, HTTPError, TodoServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "server.db")
+    manager = TaskManager(path)
+    task_ids = manager.add_tasks({"title": f"Task {i}"} for i in range(5))
+    manager.complete_task(task_ids[0])
+    manager.archive_completed(older_than_days=-1)
+    manager.close()
+
+    pool = ConnectionPool(path, readers=2)
+    yield TodoServer(pool)
+    pool.shutdown()
+
+
+def request(server, method, target, body=None):
+    payload = None if body is None else json.dumps(body).encode()
+    try:
+        status, _, payload = asyncio.run(server.dispatch(method, target, {}, payload))
+    except HTTPError as error:
+        return error.status, str(error)
+    return status, payload
+
+
+def test_pages_follow_next(server):
+    seen = []
+    target = "/tasks?all=1&limit=2"
+    while True:
+        status, payload = request(server, "GET", target)
+        assert status == HTTPStatus.OK
+        seen += [task["id"] for task in payload["tasks"]]
+        if payload["next"] is None:
+            break
+        target = "/tasks?all=1&limit=2&after=" + payload["next"]
+    # The archived task comes last
+    assert seen == [2, 3, 4, 5, 1]
+
+
+@pytest.mark.parametrize("after", [
+    "nonsense", "{}", "[]", '["archive"]', "[1]", '["x", 1, 2]', "[9, null, 1]", "[true, null, 1]",
+    "[2, null, true]", '[2, "soon", 1]', "[2, null, 1.5]", '["archive", null, 1]', "[2, null, 99999999999999999999]"
+])
+def test_bad_cursors(server, after):
+    assert request(server, "GET", "/tasks?all=1&after=" + after) == (
+        HTTPStatus.BAD_REQUEST, "after must be the next value of a previous page"
+    )
+
+
+def test_valid_cursors(server):
+    assert request(server, "GET", "/tasks?after=[2, null, 3]")[0] == HTTPStatus.OK
+    assert request(server, "GET", "/tasks?all=1&after=[\"archive\", 0, 0]") == (
+        HTTPStatus.OK, {"tasks": [], "next": None}
+    )
+
+
+def test_writes_go_through_the_writer(server):
+    status, payload = request(server, "POST", "/tasks", {"title": "New", "priority": "high"})
+    assert status == HTTPStatus.CREATED
+    task_id = payload["ids"][0]
+    assert request(server, "POST", f"/tasks/{task_id}/complete") == (HTTPStatus.OK, {"id": task_id})
+    assert request(server, "GET", f"/tasks/{task_id}")[1]["completed_at"] is not None
+    assert request(server, "DELETE", "/tasks/999")[0] == HTTPStatus.NOT_FOUND
+
+
+def conditional_get(server, target, if_none_match=None):
+    headers = {"if-none-match": if_none_match} if if_none_match is not None else {}
+    status, response_headers, _ = asyncio.run(server.dispatch("GET", target, headers, b""))
+    return status, response_headers.get("ETag")
+
+
+def test_unchanged_responses_are_not_modified(server):
+    status, etag = conditional_get(server, "/tasks")
+    assert status == HTTPStatus.OK and etag
+    assert conditional_get(server, "/tasks", etag) == (HTTPStatus.NOT_MODIFIED, etag)
+    assert conditional_get(server, "/stats", f'"other", {etag}')[0] == HTTPStatus.NOT_MODIFIED
+    assert conditional_get(server, "/stats", "W/" + etag)[0] == HTTPStatus.NOT_MODIFIED
+    assert conditional_get(server, "/stats", "*")[0] == HTTPStatus.NOT_MODIFIED
+
+    # Only exact tags match, not substrings of the header
+    assert conditional_get(server, "/tasks", "x" + etag)[0] == HTTPStatus.OK
+    assert conditional_get(server, "/tasks", etag + "x")[0] == HTTPStatus.OK
+
+    # Every write changes the tag
+    request(server, "POST", "/tasks", {"title": "New"})
+    status, new_etag = conditional_get(server, "/tasks", etag)
+    assert status == HTTPStatus.OK and new_etag != etag
+
+
+def test_overdue_filters_are_always_run(server):
+    # is:overdue changes with the time of day, not only with writes
+    for target in ("/tasks?filter=is:overdue", "/tasks?filter=-is:overdue+priority:high"):
+        assert conditional_get(server, target, "*") == (HTTPStatus.OK, None)
+    assert conditional_get(server, "/tasks?filter=is:open", "*")[0] == HTTPStatus.NOT_MODIFIED
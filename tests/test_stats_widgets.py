@@ -0,0 +1,61 @@
+# Refreshing the statistics must reuse the sidebar's widgets: an update that
+# creates a widget per refresh grows the widget tree, and Tk's memory with it,
+# for as long as the window is open. Needs a display; skipped without one.
+import os
+import sys
+import time
+import tkinter as tk
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import todo_core
+
+REFRESHES = 1000
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def settle(app):
+    # Runs the Tk loop until every database callback has been delivered
+    while app.task_db._pending:
+        app.update()
+        time.sleep(0.001)
+    app.update()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        pytest.skip("no display")
+
+    monkeypatch.setattr(todo_core, "DEFAULT_DB_PATH", str(tmp_path / "todo.db"))
+    from todo import ModernTodoApp
+    app = ModernTodoApp()
+    settle(app)
+    yield app
+    app.on_close()
+
+
+def test_update_stats_reuses_widgets(app):
+    # Some tasks, so the counters and facets have something to show
+    app.task_manager.add_tasks({"title": f"Task {i}", "category": "Work"} for i in range(20))
+    app.update_stats()
+    settle(app)
+    sidebar = count_widgets(app.sidebar)
+    stats = count_widgets(app.stats_frame)
+
+    for i in range(REFRESHES):
+        # Changing values every so often, so the labels are really updated
+        if i % 100 == 0:
+            app.task_manager.complete_task(app.task_manager.add_task(f"Done {i}", category="Work"))
+        app.update_stats()
+        settle(app)
+
+    assert count_widgets(app.stats_frame) == stats
+    assert count_widgets(app.sidebar) == sidebar
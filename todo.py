@@ -1,238 +1,262 @@
 import os
-import sys
-import sqlite3
+import time
+import logging
+import queue
 import datetime
-from enum import Enum
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import messagebox
-from tkinter.scrolledtext import ScrolledText
 import customtkinter as ctk
-from PIL import Image, ImageTk
-from tkcalendar import DateEntry
+from todo_core import (
+    DESCRIPTION_PREVIEW_LENGTH,
+    DUE_FACETS,
+    FILTER_TOKEN,
+    CategoryCreated,
+    FilterError,
+    Priority,
+    TASK_FIELDS,
+    TaskAdded,
+    TaskDeleted,
+    TaskManager,
+    TaskManagerPool,
+    list_order_key,
+    page_cursor_key
+)
 
-# Set appearance mode and default theme
-ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
-ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+logger = logging.getLogger(__name__)
 
-# Define Priority Levels
-class Priority(Enum):
-    LOW = 1
-    MEDIUM = 2
-    HIGH = 3
-    CRITICAL = 4
-
-# Database Setup
-def init_database():
-    db_path = os.path.join(os.path.expanduser("~"), ".fancy_todo.db")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create tables if they don't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY,
-        name TEXT UNIQUE NOT NULL
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS tasks (
-        id INTEGER PRIMARY KEY,
-        title TEXT NOT NULL,
-        description TEXT,
-        created_at TIMESTAMP NOT NULL,
-        due_date TIMESTAMP,
-        completed_at TIMESTAMP,
-        priority INTEGER NOT NULL,
-        category_id INTEGER,
-        FOREIGN KEY (category_id) REFERENCES categories (id)
-    )
-    ''')
-    
-    # Insert default categories if they don't exist
-    default_categories = ["Work", "Personal", "Shopping", "Health", "Education"]
-    for category in default_categories:
-        cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,))
-    
-    conn.commit()
-    return conn
+# Asynchronous front end for TaskManager over a TaskManagerPool, plus one
+# search thread. Callbacks are marshalled back to the Tk thread by polling a
+# queue with after(), since Tk must only be touched from its own thread.
+class AsyncTaskManager(TaskManagerPool):
+    POLL_INTERVAL = 15  # ms
+    
+    def __init__(self, root, db_path=None, profile=None, readers=2):
+        self.root = root
+        self._search_manager = None
+        self._search_future = None
+        self._search_generation = 0
+        self._done = queue.Queue()
+        self._events = queue.Queue()
+        self._subscribers = []
+        self._pending = 0
+        self._poll_id = None
+        super().__init__(db_path, profile, readers)
+        self._searcher = ThreadPoolExecutor(1, "todo-db-search", self._open_search_connection)
+    
+    def _open_writer_connection(self):
+        # All writes go through this connection, so its events cover every change we make
+        self._open_connection()
+        self._local.manager.subscribe(self._events.put)
+    
+    def _open_search_connection(self):
+        self._open_connection()
+        self._search_manager = self._local.manager
+    
+    def write(self, method, *args, callback=None, on_error=None, **kwargs):
+        # Runs TaskManager.<method> on the writer thread; returns a Future
+        return self._deliver(self.submit_write(method, *args, **kwargs), callback, on_error)
+    
+    def subscribe(self, callback):
+        # callback(events) gets the change events of each committed write on the
+        # Tk thread, before the callback of the write that caused them
+        self._subscribers.append(callback)
+    
+    def read(self, method, *args, callback=None, on_error=None, **kwargs):
+        # Runs TaskManager.<method> on a reader thread; returns a Future
+        return self._deliver(self.submit_read(method, *args, **kwargs), callback, on_error)
+    
+    def search(self, method, *args, callback=None, on_error=None, **kwargs):
+        # Runs TaskManager.<method> on the search thread. Each call supersedes the
+        # previous one: a queued search is cancelled, a running one is interrupted,
+        # and only the latest search ever reaches its callbacks.
+        self.cancel_search()
+        generation = self._search_generation
+        
+        def deliver(result):
+            if generation == self._search_generation and callback:
+                callback(result)
+        
+        def fail(error):
+            if generation != self._search_generation:
+                return
+            if on_error:
+                on_error(error)
+            else:
+                logger.error("Search failed", exc_info=error)
+        
+        future = self._searcher.submit(self._call, method, args, kwargs)
+        self._search_future = self._deliver(future, deliver, fail)
+        return self._search_future
+    
+    def cancel_search(self):
+        self._search_generation += 1
+        future, self._search_future = self._search_future, None
+        if future is None or future.cancel() or future.done():
+            return
+        # sqlite3 allows interrupt() from another thread; the query stops at its
+        # next step with an "interrupted" OperationalError that nobody receives
+        if self._search_manager is not None:
+            self._search_manager.conn.interrupt()
+    
+    def _deliver(self, future, callback, on_error):
+        # Hands the outcome of future to callback or on_error on the Tk thread
+        self._pending += 1
+        future.add_done_callback(lambda f: self._done.put((f, callback, on_error)))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+        return future
+    
+    def _poll(self):
+        # Deliver change events and finished results on the Tk thread. Events are
+        # queued before their write finishes, so one poll sees both.
+        self._poll_id = None
+        while True:
+            try:
+                events = self._events.get_nowait()
+            except queue.Empty:
+                break
+            for callback in self._subscribers:
+                callback(events)
+        
+        while True:
+            try:
+                future, callback, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if future.cancelled():
+                continue
+            
+            error = future.exception()
+            if error is None:
+                if callback:
+                    callback(future.result())
+            elif on_error:
+                on_error(error)
+            else:
+                logger.error("Database call failed", exc_info=error)
+        
+        if self._pending:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+    
+    def shutdown(self):
+        self.cancel_search()
+        super().shutdown()
+        self._searcher.submit(self._close_connection)
+        self._searcher.shutdown(wait=True)
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
 
-# Task Management
-class TaskManager:
+# Observable set of named counters; subscribers only hear about the values that changed
+class ObservableCounters:
     def __init__(self):
-        self.conn = init_database()
-        self.cursor = self.conn.cursor()
-    
-    def add_task(self, title, description="", due_date=None, priority=Priority.MEDIUM, category="Personal"):
-        # Get category id
-        self.cursor.execute("SELECT id FROM categories WHERE name = ?", (category,))
-        result = self.cursor.fetchone()
-        if not result:
-            self.cursor.execute("INSERT INTO categories (name) VALUES (?)", (category,))
-            self.conn.commit()
-            category_id = self.cursor.lastrowid
-        else:
-            category_id = result[0]
-        
-        # Add task
-        self.cursor.execute('''
-        INSERT INTO tasks (title, description, created_at, due_date, priority, category_id)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (title, description, datetime.datetime.now(), due_date, priority.value, category_id))
-        self.conn.commit()
-        return self.cursor.lastrowid
-    
-    def get_all_tasks(self, include_completed=False):
-        query = '''
-        SELECT t.id, t.title, t.description, t.created_at, t.due_date, t.completed_at, t.priority, c.name
-        FROM tasks t
-        JOIN categories c ON t.category_id = c.id
-        '''
-        if not include_completed:
-            query += " WHERE t.completed_at IS NULL"
-        query += " ORDER BY t.priority DESC, t.due_date ASC"
-        
-        self.cursor.execute(query)
-        return self.cursor.fetchall()
-    
-    def get_task(self, task_id):
-        self.cursor.execute('''
-        SELECT t.id, t.title, t.description, t.created_at, t.due_date, t.completed_at, t.priority, c.name
-        FROM tasks t
-        JOIN categories c ON t.category_id = c.id
-        WHERE t.id = ?
-        ''', (task_id,))
-        return self.cursor.fetchone()
-    
-    def update_task(self, task_id, title=None, description=None, due_date=None, priority=None, category=None):
-        updates = []
-        parameters = []
-        
-        if title:
-            updates.append("title = ?")
-            parameters.append(title)
-        
-        if description is not None:
-            updates.append("description = ?")
-            parameters.append(description)
-        
-        if due_date is not None:
-            updates.append("due_date = ?")
-            parameters.append(due_date)
-        
-        if priority is not None:
-            updates.append("priority = ?")
-            parameters.append(priority.value)
-        
-        if category:
-            # Get category id
-            self.cursor.execute("SELECT id FROM categories WHERE name = ?", (category,))
-            result = self.cursor.fetchone()
-            if not result:
-                self.cursor.execute("INSERT INTO categories (name) VALUES (?)", (category,))
-                self.conn.commit()
-                category_id = self.cursor.lastrowid
+        self.values = {}
+        self.subscribers = []
+    
+    def subscribe(self, callback):
+        # callback(changed, values) gets the changed entries and all current values
+        self.subscribers.append(callback)
+    
+    def update(self, values):
+        changed = {name: value for name, value in values.items() if self.values.get(name) != value}
+        if not changed:
+            return
+        self.values.update(changed)
+        for callback in self.subscribers:
+            callback(changed, self.values)
+
+# Task list diffing
+# A single list operation: kind is "insert", "move", "update" or "remove",
+# index is the position in the new list and changed the names of changed fields
+ListOp = namedtuple("ListOp", ["kind", "index", "task", "changed"])
+
+def longest_increasing_subsequence(values):
+    # Returns the positions of one longest strictly increasing subsequence
+    tails = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if values[tails[mid]] < value:
+                lo = mid + 1
             else:
-                category_id = result[0]
-            
-            updates.append("category_id = ?")
-            parameters.append(category_id)
-        
-        if updates:
-            query = f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?"
-            parameters.append(task_id)
-            self.cursor.execute(query, parameters)
-            self.conn.commit()
-            return True
-        return False
-    
-    def complete_task(self, task_id):
-        self.cursor.execute(
-            "UPDATE tasks SET completed_at = ? WHERE id = ?",
-            (datetime.datetime.now(), task_id)
-        )
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+                hi = mid
+        if lo > 0:
+            previous[i] = tails[lo - 1]
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
     
-    def uncomplete_task(self, task_id):
-        self.cursor.execute("UPDATE tasks SET completed_at = NULL WHERE id = ?", (task_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+    result = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        result.add(i)
+        i = previous[i]
+    return result
+
+def diff_task_lists(old_tasks, new_tasks):
+    # Computes the smallest set of operations turning old_tasks into new_tasks,
+    # keyed by task id. Removals come first, the rest follow the new order so
+    # they can be applied front to back.
+    old_index = {task.id: i for i, task in enumerate(old_tasks)}
+    new_ids = {task.id for task in new_tasks}
     
-    def delete_task(self, task_id):
-        self.cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
-    
-    def get_categories(self):
-        self.cursor.execute("SELECT id, name FROM categories ORDER BY name")
-        return self.cursor.fetchall()
-    
-    def search_tasks(self, query):
-        search_query = f"%{query}%"
-        self.cursor.execute('''
-        SELECT t.id, t.title, t.description, t.created_at, t.due_date, t.completed_at, t.priority, c.name
-        FROM tasks t
-        JOIN categories c ON t.category_id = c.id
-        WHERE t.title LIKE ? OR t.description LIKE ?
-        ORDER BY t.priority DESC, t.due_date ASC
-        ''', (search_query, search_query))
-        return self.cursor.fetchall()
-    
-    def get_stats(self):
-        # Get total tasks
-        self.cursor.execute("SELECT COUNT(*) FROM tasks")
-        total = self.cursor.fetchone()[0]
-        
-        # Get completed tasks
-        self.cursor.execute("SELECT COUNT(*) FROM tasks WHERE completed_at IS NOT NULL")
-        completed = self.cursor.fetchone()[0]
-        
-        # Get tasks due today
-        today = datetime.datetime.now().date()
-        today_start = datetime.datetime.combine(today, datetime.time.min)
-        today_end = datetime.datetime.combine(today, datetime.time.max)
-        
-        self.cursor.execute(
-            "SELECT COUNT(*) FROM tasks WHERE due_date BETWEEN ? AND ?", 
-            (today_start, today_end)
-        )
-        due_today = self.cursor.fetchone()[0]
-        
-        # Get overdue tasks
-        self.cursor.execute(
-            "SELECT COUNT(*) FROM tasks WHERE due_date < ? AND completed_at IS NULL", 
-            (today_start,)
+    ops = [ListOp("remove", None, task, None) for task in old_tasks if task.id not in new_ids]
+    
+    # Rows kept in the longest run that is still in order don't need to move
+    kept = [i for i, task in enumerate(new_tasks) if task.id in old_index]
+    in_order = longest_increasing_subsequence([old_index[new_tasks[i].id] for i in kept])
+    stable = {kept[k] for k in in_order}
+    
+    for i, task in enumerate(new_tasks):
+        old_i = old_index.get(task.id)
+        if old_i is None:
+            ops.append(ListOp("insert", i, task, None))
+            continue
+        
+        old_task = old_tasks[old_i]
+        changed = tuple(
+            field for field in TASK_FIELDS
+            if getattr(old_task, field) != getattr(task, field)
         )
-        overdue = self.cursor.fetchone()[0]
-        
-        return {
-            "total": total,
-            "completed": completed,
-            "due_today": due_today,
-            "overdue": overdue
-        }
+        if i not in stable:
+            ops.append(ListOp("move", i, task, changed))
+        elif changed:
+            ops.append(ListOp("update", i, task, changed))
+    return ops
 
 # Task Card UI Component
 class TaskCard(ctk.CTkFrame):
+    # Fonts are shared by every card instead of being created per card
+    _fonts = None
+    
+    @classmethod
+    def get_fonts(cls):
+        if cls._fonts is None:
+            cls._fonts = {
+                "title": ctk.CTkFont(size=16, weight="bold"),
+                "normal": ctk.CTkFont(size=12),
+                "small": ctk.CTkFont(size=10)
+            }
+        return cls._fonts
+    
     def __init__(self, master, task_data, on_select=None, on_complete=None, on_delete=None, on_edit=None, **kwargs):
         super().__init__(master, **kwargs)
         
-        self.task_data = task_data
+        self.task_data = None
         self.on_select = on_select
         self.on_complete = on_complete
         self.on_delete = on_delete
         self.on_edit = on_edit
         self.selected = False
+        fonts = self.get_fonts()
         
-        # Extract task data
-        task_id, title, desc, created, due, completed, priority, category = task_data
-        
-        self.configure(
-            corner_radius=10,
-            border_width=2,
-            fg_color=self.get_priority_color(priority, completed)
-        )
+        self.configure(corner_radius=10, border_width=2)
         
         # Create layout
         self.columnconfigure(0, weight=1)
@@ -241,8 +265,8 @@ class TaskCard(ctk.CTkFrame):
         # Task title
         self.title_label = ctk.CTkLabel(
             self, 
-            text=title, 
-            font=ctk.CTkFont(size=16, weight="bold"),
+            text="", 
+            font=fonts["title"],
             anchor="w"
         )
         self.title_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="ew", columnspan=4)
@@ -250,41 +274,28 @@ class TaskCard(ctk.CTkFrame):
         # Category badge
         self.category_badge = ctk.CTkLabel(
             self,
-            text=f" {category} ",
+            text="",
             corner_radius=5,
             fg_color="#555555",
             text_color="#ffffff",
-            font=ctk.CTkFont(size=12)
+            font=fonts["normal"]
         )
         self.category_badge.grid(row=1, column=0, padx=10, pady=(0, 5), sticky="w")
         
         # Due date
-        due_str = "No due date"
-        if due:
-            due_date = datetime.datetime.fromisoformat(due.replace("Z", "+00:00"))
-            due_str = due_date.strftime("%Y-%m-%d %H:%M")
-            
-            # Highlight overdue tasks
-            if not completed and due_date < datetime.datetime.now():
-                due_str = f"⚠️ OVERDUE: {due_str}"
-        
         self.due_label = ctk.CTkLabel(
             self,
-            text=due_str,
-            font=ctk.CTkFont(size=12),
+            text="",
+            font=fonts["normal"],
             anchor="w"
         )
         self.due_label.grid(row=2, column=0, padx=10, pady=(0, 5), sticky="w", columnspan=4)
         
         # Description (limited)
-        desc_text = desc if desc else "No description"
-        if len(desc_text) > 100:
-            desc_text = desc_text[:97] + "..."
-        
         self.desc_label = ctk.CTkLabel(
             self,
-            text=desc_text,
-            font=ctk.CTkFont(size=12),
+            text="",
+            font=fonts["normal"],
             anchor="w",
             justify="left",
             wraplength=300
@@ -296,15 +307,10 @@ class TaskCard(ctk.CTkFrame):
         button_frame.grid(row=4, column=0, padx=10, pady=10, sticky="ew", columnspan=4)
         
         # Complete/Uncomplete button
-        if completed:
-            complete_text = "↩️ Undo"
-        else:
-            complete_text = "✓ Complete"
-            
         self.complete_button = ctk.CTkButton(
             button_frame, 
-            text=complete_text,
-            font=ctk.CTkFont(size=12),
+            text="",
+            font=fonts["normal"],
             width=30,
             height=25,
             command=self._on_complete_clicked
@@ -315,7 +321,7 @@ class TaskCard(ctk.CTkFrame):
         self.edit_button = ctk.CTkButton(
             button_frame, 
             text="✏️ Edit",
-            font=ctk.CTkFont(size=12),
+            font=fonts["normal"],
             width=30,
             height=25,
             command=self._on_edit_clicked
@@ -326,7 +332,7 @@ class TaskCard(ctk.CTkFrame):
         self.delete_button = ctk.CTkButton(
             button_frame, 
             text="🗑️ Delete",
-            font=ctk.CTkFont(size=12),
+            font=fonts["normal"],
             width=30,
             height=25,
             fg_color="#FF5252",
@@ -338,11 +344,11 @@ class TaskCard(ctk.CTkFrame):
         # ID badge in corner
         self.id_badge = ctk.CTkLabel(
             self,
-            text=f"#{task_id}",
+            text="",
             corner_radius=5,
             fg_color="#333333",
             text_color="#ffffff",
-            font=ctk.CTkFont(size=10),
+            font=fonts["small"],
             width=5,
             height=5
         )
@@ -353,9 +359,50 @@ class TaskCard(ctk.CTkFrame):
         self.bind("<Leave>", self._on_hover_leave)
         self.bind("<Button-1>", self._on_click)
         
+        # Fill in the task specific content
+        self.set_task(task_data)
+    
+    def set_task(self, task_data):
+        # Rebind the card to a task in place, so pooled cards can be reused.
+        # Only the widgets whose content actually changed get reconfigured.
+        self.task_data = task = task_data
+        
+        color = self.get_priority_color(task.priority, task.is_completed)
+        if self.cget("fg_color") != color:
+            self.configure(fg_color=color)
+        
         # If completed, add strikethrough effect
-        if completed:
-            self.title_label.configure(text=self._strikethrough(title))
+        self._set_text(self.title_label, self._strikethrough(task.title) if task.is_completed else task.title)
+        self._set_text(self.category_badge, f" {task.category} ")
+        
+        # Due date, parsed once per task record
+        due_str = "No due date"
+        if task.due:
+            due_str = task.due.strftime("%Y-%m-%d %H:%M")
+            
+            # Highlight overdue tasks
+            if task.is_overdue:
+                due_str = f"⚠️ OVERDUE: {due_str}"
+        self._set_text(self.due_label, due_str)
+        
+        # Description preview; list queries already cut it down in SQL
+        desc_text = task.description if task.description else "No description"
+        if len(desc_text) > DESCRIPTION_PREVIEW_LENGTH:
+            desc_text = desc_text[:DESCRIPTION_PREVIEW_LENGTH - 3] + "..."
+        self._set_text(self.desc_label, desc_text)
+        
+        # Complete/Uncomplete button
+        if task.is_completed:
+            complete_text = "↩️ Undo"
+        else:
+            complete_text = "✓ Complete"
+        self._set_text(self.complete_button, complete_text)
+        
+        self._set_text(self.id_badge, f"#{task.id}")
+    
+    def _set_text(self, widget, text):
+        if widget.cget("text") != text:
+            widget.configure(text=text)
     
     def _strikethrough(self, text):
         # Note: This is a workaround since Tkinter doesn't support text strikethrough directly
@@ -385,19 +432,19 @@ class TaskCard(ctk.CTkFrame):
     
     def _on_click(self, event):
         if self.on_select:
-            self.on_select(self.task_data[0])  # Pass task ID
+            self.on_select(self.task_data.id)  # Pass task ID
     
     def _on_complete_clicked(self):
         if self.on_complete:
-            self.on_complete(self.task_data[0])  # Pass task ID
+            self.on_complete(self.task_data.id)  # Pass task ID
     
     def _on_delete_clicked(self):
         if self.on_delete:
-            self.on_delete(self.task_data[0])  # Pass task ID
+            self.on_delete(self.task_data.id)  # Pass task ID
     
     def _on_edit_clicked(self):
         if self.on_edit:
-            self.on_edit(self.task_data[0])  # Pass task ID
+            self.on_edit(self.task_data.id)  # Pass task ID
     
     def set_selected(self, selected):
         self.selected = selected
@@ -406,26 +453,253 @@ class TaskCard(ctk.CTkFrame):
         else:
             self.configure(border_color=None)
 
+# Per-app pool of task cards keyed by task id, so a refresh rebinds existing
+# cards instead of destroying and rebuilding all of them
+class TaskCardPool:
+    MAX_SPARES = 20  # Released cards kept around for reuse by new rows
+    
+    def __init__(self, card_factory):
+        self.card_factory = card_factory
+        self.cards = {}
+        self.spares = []
+    
+    def acquire(self, task):
+        # Returns the card for the task and whether it is new to the list
+        card = self.cards.get(task.id)
+        if card is not None:
+            card.set_task(task)
+            return card, False
+        
+        if self.spares:
+            card = self.spares.pop()
+            card.set_task(task)
+        else:
+            card = self.card_factory(task)
+        self.cards[task.id] = card
+        return card, True
+    
+    def release(self, task_id):
+        card = self.cards.pop(task_id)
+        if len(self.spares) < self.MAX_SPARES:
+            card.pack_forget()
+            card.set_selected(False)
+            self.spares.append(card)
+        else:
+            card.destroy()
+    
+    def retain(self, task_ids):
+        # Release every card whose task is not in task_ids
+        for task_id in [task_id for task_id in self.cards if task_id not in task_ids]:
+            self.release(task_id)
+    
+    def clear(self):
+        for card in list(self.cards.values()) + self.spares:
+            card.destroy()
+        self.cards = {}
+        self.spares = []
+
+# Cooperative render scheduler: runs queued UI jobs in batches that each fit
+# in a small time budget, so a big refresh never freezes the main loop
+class RenderScheduler:
+    def __init__(self, widget, budget_ms=8):
+        self.widget = widget
+        self.budget = budget_ms / 1000
+        self.generation = 0
+        self.jobs = deque()
+        self._after_id = None
+    
+    def start(self, jobs):
+        # A new batch replaces whatever the previous generation left pending
+        self.cancel()
+        self.generation += 1
+        self.jobs = deque(jobs)
+        if self.jobs:
+            self._after_id = self.widget.after_idle(self._tick, self.generation)
+        return self.generation
+    
+    def cancel(self):
+        # Returns True if unfinished work was dropped
+        pending = bool(self.jobs)
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.jobs.clear()
+        return pending
+    
+    def _tick(self, generation):
+        self._after_id = None
+        if generation != self.generation:
+            return
+        
+        deadline = time.perf_counter() + self.budget
+        while self.jobs and time.perf_counter() < deadline:
+            self.jobs.popleft()()
+        
+        # Yield to the event loop before the next batch
+        if self.jobs and generation == self.generation:
+            self._after_id = self.widget.after(1, self._tick, generation)
+
+# Virtualized task list: only the rows inside the viewport get a TaskCard
+class VirtualTaskList:
+    CARD_HEIGHT = 180
+    ROW_HEIGHT = 190  # Card height plus vertical padding
+    OVERSCAN = 3  # Extra rows built above and below the viewport
+    NEAR_END_ROWS = 20  # on_near_end fires when the viewport gets this close to the last row
+    
+    def __init__(self, scroll_frame, card_factory, on_bind=None, on_near_end=None):
+        self.scroll_frame = scroll_frame
+        self.canvas = scroll_frame._parent_canvas
+        self.scrollbar = scroll_frame._scrollbar
+        self.card_factory = card_factory
+        self.on_bind = on_bind
+        self.on_near_end = on_near_end
+        self.active = False
+        self.rows = []
+        
+        # Pool of cards; visible maps row index -> card, cards maps task id -> card
+        self.pool = []
+        self.visible = {}
+        self.cards = {}
+        self._pending_update = None
+        
+        # Spacer giving the scrollable frame the full height of all rows
+        self.sizer = tk.Frame(scroll_frame, width=1, height=0, highlightthickness=0, borderwidth=0)
+        
+        # Track the scroll offset of the canvas behind the scrollable frame
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_update(), add="+")
+    
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        if not self.active:
+            self.active = True
+            self.sizer.pack(anchor="nw")
+        self.sizer.configure(height=max(1, len(self.rows) * self.ROW_HEIGHT))
+        
+        # Rows moved under the visible cards, so rebind everything in view
+        self._release_all()
+        self.update_viewport()
+    
+    def append_rows(self, rows):
+        # Rows loaded later (e.g. the next page) go below the existing ones
+        self.rows.extend(rows)
+        self.sizer.configure(height=max(1, len(self.rows) * self.ROW_HEIGHT))
+        self.update_viewport()
+    
+    def deactivate(self):
+        if not self.active:
+            return
+        self.active = False
+        self.rows = []
+        self._release_all()
+        self.sizer.pack_forget()
+    
+    def schedule_update(self):
+        if self.active and self._pending_update is None:
+            self._pending_update = self.canvas.after_idle(self.update_viewport)
+    
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_update()
+    
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.ROW_HEIGHT)
+        first = max(0, int(top // self.ROW_HEIGHT) - self.OVERSCAN)
+        last = min(len(self.rows), int((top + height) // self.ROW_HEIGHT) + 1 + self.OVERSCAN)
+        return first, last
+    
+    def update_viewport(self):
+        self._pending_update = None
+        if not self.active:
+            return
+        
+        first, last = self._visible_range()
+        
+        # Return cards that scrolled out of range to the pool
+        for index in [i for i in self.visible if i < first or i >= last]:
+            self._release(index)
+        
+        # Bind pooled cards to the rows that scrolled into range
+        for index in range(first, last):
+            if index not in self.visible:
+                self._bind(index)
+        
+        if self.on_near_end and last >= len(self.rows) - self.NEAR_END_ROWS:
+            self.canvas.after_idle(self.on_near_end)
+    
+    def _bind(self, index):
+        task = self.rows[index]
+        if self.pool:
+            card = self.pool.pop()
+            card.set_task(task)
+        else:
+            card = self.card_factory(task)
+        
+        card.place(x=5, y=index * self.ROW_HEIGHT + 5, relwidth=1.0, width=-10, height=self.CARD_HEIGHT)
+        self.visible[index] = card
+        self.cards[task.id] = card
+        if self.on_bind:
+            self.on_bind(card)
+    
+    def _release(self, index):
+        card = self.visible.pop(index)
+        card.place_forget()
+        card.set_selected(False)
+        self.cards.pop(card.task_data.id, None)
+        self.pool.append(card)
+    
+    def _release_all(self):
+        for index in list(self.visible):
+            self._release(index)
+
 # Modern Todo App UI
 class ModernTodoApp(ctk.CTk):
+    # Lists longer than this switch to the virtualized view
+    VIRTUALIZE_THRESHOLD = 200
+    # Refreshes changing more cards than this are rendered without animation
+    ANIMATE_THRESHOLD = 50
+    # Rows fetched per page for the virtualized view
+    PAGE_SIZE = 200
+    # Pause in typing (ms) before the search runs
+    SEARCH_DELAY = 250
+    # Seconds between archive runs, each moving at most one batch of old completed tasks
+    ARCHIVE_INTERVAL = 600
+    # Milliseconds between checks for changes made by other windows and processes
+    CHANGE_POLL_INTERVAL = 1000
+    
     def __init__(self):
+        # Set appearance mode and default theme
+        ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
+        ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+        
         super().__init__()
         self.title("Fancy Todo App")
         self.geometry("1100x700")
         self.minsize(900, 600)
         
-        # Initialize task manager
+        # Initialize task manager; it serves reads on the UI thread, while
+        # writes go through the background writer of task_db
         self.task_manager = TaskManager()
+        self.task_db = AsyncTaskManager(self)
+        self.task_db.subscribe(self.on_task_events)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.schedule_checkpoint()
+        self.run_archive()
         
         # UI elements
         self.selected_task_id = None
         self.task_cards = {}
+        self.shown_tasks = []
+        self.search_after_id = None
         
         # Setup the main layout
         self.setup_ui()
         
-        # Load initial data
+        # Load initial data; changes from then on are picked up from the change log
+        self.revision = self.task_manager.get_revision()
         self.refresh_tasks()
+        self.after(self.CHANGE_POLL_INTERVAL, self.poll_changes)
     
     def setup_ui(self):
         # Create main layout with sidebar and content area
@@ -459,6 +733,28 @@ class ModernTodoApp(ctk.CTk):
         self.tasks_frame = ctk.CTkScrollableFrame(self.tasks_frame_outer)
         self.tasks_frame.grid(row=0, column=0, sticky="nsew")
         self.tasks_frame.grid_columnconfigure(0, weight=1)
+        
+        # Large lists are rendered through a virtualized view with a pool of cards
+        self.virtual_list = VirtualTaskList(
+            self.tasks_frame,
+            self.create_task_card,
+            on_bind=self.on_card_bound,
+            on_near_end=self.load_next_page
+        )
+        self.page_cursor = None
+        self.page_include_completed = False
+        self.page_loading = False
+        
+        # Bumped by every list refresh and search, and by every stats refresh,
+        # so results of superseded reads are dropped
+        self.list_generation = 0
+        self.stats_generation = 0
+        
+        # Smaller lists keep their cards across refreshes, keyed by task id
+        self.card_pool = TaskCardPool(self.create_task_card)
+        
+        # Card changes are applied in small time-budgeted batches
+        self.render_scheduler = RenderScheduler(self)
     
     def setup_sidebar(self):
         # App logo/title
@@ -490,6 +786,17 @@ class ModernTodoApp(ctk.CTk):
         # Stats panels
         self.stats_frame = ctk.CTkFrame(self.sidebar)
         self.stats_frame.grid(row=3, column=0, padx=20, pady=0, sticky="ew")
+        self.setup_stats_panel()
+        
+        # Facet counts, clicking one filters the list
+        self.facets_frame = ctk.CTkScrollableFrame(
+            self.sidebar,
+            height=180,
+            label_text="Filters",
+            label_font=ctk.CTkFont(size=16, weight="bold")
+        )
+        self.facets_frame.grid(row=5, column=0, padx=20, pady=(10, 0), sticky="ew")
+        self.setup_facet_panel()
         
         # Setup theme switcher
         self.appearance_mode_label = ctk.CTkLabel(
@@ -497,14 +804,14 @@ class ModernTodoApp(ctk.CTk):
             text="Appearance Mode:",
             font=ctk.CTkFont(size=14, weight="bold")
         )
-        self.appearance_mode_label.grid(row=5, column=0, padx=20, pady=(20, 0), sticky="w")
+        self.appearance_mode_label.grid(row=6, column=0, padx=20, pady=(20, 0), sticky="w")
         
         self.appearance_mode_menu = ctk.CTkOptionMenu(
             self.sidebar,
             values=["System", "Light", "Dark"],
             command=self.change_appearance_mode
         )
-        self.appearance_mode_menu.grid(row=6, column=0, padx=20, pady=10, sticky="w")
+        self.appearance_mode_menu.grid(row=7, column=0, padx=20, pady=10, sticky="w")
         
         # Set default appearance
         self.appearance_mode_menu.set("System")
@@ -535,12 +842,13 @@ class ModernTodoApp(ctk.CTk):
         self.search_entry = ctk.CTkEntry(
             self.filter_frame,
             textvariable=self.search_var,
-            placeholder_text="Search for tasks...",
+            placeholder_text="Search, or priority:high due:<+3d",
             height=35,
             width=250,
             font=ctk.CTkFont(size=14)
         )
         self.search_entry.grid(row=0, column=1, padx=5, pady=10, sticky="w")
+        self.search_var.trace_add("write", self.on_search_changed)
         
         # Search button
         self.search_button = ctk.CTkButton(
@@ -572,30 +880,127 @@ class ModernTodoApp(ctk.CTk):
             font=ctk.CTkFont(size=14)
         )
         self.show_completed.grid(row=0, column=4, padx=(20, 10), pady=10)
+        
+        # Why the filter in the search box doesn't parse; only shown while it doesn't
+        self.filter_error_label = ctk.CTkLabel(
+            self.filter_frame,
+            text="",
+            text_color="#F44336",
+            font=ctk.CTkFont(size=12)
+        )
+        self.filter_error_label.grid(row=1, column=1, columnspan=4, padx=5, pady=(0, 5), sticky="w")
+        self.filter_error_label.grid_remove()
     
     def refresh_tasks(self):
-        # Clear existing task cards
-        for widget in self.tasks_frame.winfo_children():
-            widget.destroy()
-        self.task_cards = {}
-        
-        # Get tasks from database
-        include_completed = self.show_completed_var.get()
-        tasks = self.task_manager.get_all_tasks(include_completed=include_completed)
-        
-        # Create task cards
-        for i, task in enumerate(tasks):
-            task_id = task[0]
+        # Reads run on the reader threads, so a slow disk never blocks the UI;
+        # each refresh supersedes the ones still in flight
+        if self.search_var.get().strip():
+            self.search_tasks()
+        else:
+            self.list_generation += 1
+            generation = self.list_generation
+            include_completed = self.show_completed_var.get()
             
-            # Create a task card with animation effect
-            self.after(i * 30, lambda t=task: self.add_task_card(t))
+            # Reload as many rows as were already loaded, so the scroll position survives
+            limit = self.PAGE_SIZE
+            if self.virtual_list.active:
+                limit = max(limit, len(self.virtual_list.rows))
+            self.task_db.read(
+                "get_tasks_page",
+                include_completed,
+                limit=limit,
+                callback=lambda page: self.on_tasks_loaded(generation, include_completed, *page),
+                on_error=self.on_load_error
+            )
         
         # Update statistics
         self.update_stats()
     
-    def add_task_card(self, task):
-        # Create task card with a fade-in effect
-        task_card = TaskCard(
+    def on_tasks_loaded(self, generation, include_completed, tasks, cursor):
+        if generation != self.list_generation:
+            return
+        
+        # Small lists are shown whole and diffed against the cards on screen,
+        # large ones are paged in as the user scrolls
+        if cursor is None and len(tasks) <= self.VIRTUALIZE_THRESHOLD:
+            self.show_tasks(tasks)
+        else:
+            self.page_cursor = cursor
+            self.page_include_completed = include_completed
+            self.show_tasks(tasks, virtual=True)
+    
+    def load_next_page(self):
+        if self.page_cursor is None or not self.virtual_list.active or self.page_loading:
+            return
+        
+        self.page_loading = True
+        generation = self.list_generation
+        self.task_db.read(
+            "get_tasks_page",
+            self.page_include_completed,
+            after=self.page_cursor,
+            limit=self.PAGE_SIZE,
+            callback=lambda page: self.on_page_loaded(generation, *page),
+            on_error=self.on_load_error
+        )
+    
+    def on_page_loaded(self, generation, tasks, cursor):
+        self.page_loading = False
+        if generation != self.list_generation or not self.virtual_list.active:
+            return
+        self.page_cursor = cursor
+        self.virtual_list.append_rows(tasks)
+    
+    def on_load_error(self, error):
+        self.page_loading = False
+        logger.error("Loading tasks failed", exc_info=error)
+    
+    def show_tasks(self, tasks, virtual=False):
+        # Lists that aren't paged have no next page
+        if not virtual:
+            self.page_cursor = None
+        
+        # A refresh arriving mid-render drops the rest of the previous one,
+        # and diffs against the cards that actually made it on screen
+        if self.render_scheduler.cancel():
+            self.shown_tasks = [card.task_data for card in self.tasks_frame.pack_slaves()]
+        
+        # Large lists only build the cards in the viewport
+        if virtual or len(tasks) > self.VIRTUALIZE_THRESHOLD:
+            self.clear_task_cards()
+            self.virtual_list.set_rows(tasks)
+            self.task_cards = self.virtual_list.cards
+            return
+        
+        self.virtual_list.deactivate()
+        self.task_cards = self.card_pool.cards
+        
+        # Only apply the inserts, moves, updates and removals between the two lists,
+        # a few at a time; big batches skip the fade-in animation
+        ops = diff_task_lists(self.shown_tasks, tasks)
+        animate = len(ops) <= self.ANIMATE_THRESHOLD
+        self.render_scheduler.start(
+            lambda op=op: self.apply_list_op(op, tasks, animate) for op in ops
+        )
+        self.shown_tasks = list(tasks)
+    
+    def apply_list_op(self, op, tasks, animate=True):
+        if op.kind == "remove":
+            self.card_pool.release(op.task.id)
+        elif op.kind == "update":
+            self.card_pool.cards[op.task.id].set_task(op.task)
+        else:
+            self.add_task_card(op.task, tasks, op.index, animate)
+    
+    def clear_task_cards(self):
+        self.render_scheduler.cancel()
+        self.virtual_list.deactivate()
+        self.card_pool.clear()
+        self.task_cards = {}
+        self.shown_tasks = []
+    
+    def create_task_card(self, task):
+        return TaskCard(
             self.tasks_frame, 
             task,
             on_select=self.on_task_select,
@@ -604,42 +1009,49 @@ class ModernTodoApp(ctk.CTk):
             on_edit=self.on_task_edit,
             height=180
         )
-        task_card.grid(row=len(self.task_cards), column=0, sticky="ew", padx=5, pady=5)
-        
-        # Store reference to the card
-        self.task_cards[task[0]] = task_card
-        
-        # Apply fade-in animation
-        task_card.configure(fg_color="transparent")
-        self.animate_fade_in(task_card)
-    
-    def animate_fade_in(self, widget, step=0):
-        if step < 10:
-            opacity = step / 10
-            # This is a workaround since CustomTkinter doesn't have direct opacity control
-            # We're manipulating the frame's color to create a fade-in effect
-            priority_color = widget.cget("fg_color")
-            widget.after(20, lambda: self.animate_fade_in(widget, step + 1))
-        else:
-            widget.configure(fg_color=widget.get_priority_color(widget.task_data[6], widget.task_data[5] is not None))
     
-    def update_stats(self):
-        # Clear existing stats
-        for widget in self.stats_frame.winfo_children():
-            widget.destroy()
-        
-        # Get fresh statistics
-        stats = self.task_manager.get_stats()
+    def on_card_bound(self, card):
+        # Keep the selection highlight on whichever recycled card shows the selected task
+        card.set_selected(card.task_data.id == self.selected_task_id)
+    
+    def add_task_card(self, task, tasks, index, animate=True):
+        task_card, is_new = self.card_pool.acquire(task)
         
-        # Calculate completion percentage
-        completion_pct = 0 if stats["total"] == 0 else (stats["completed"] / stats["total"]) * 100
+        # Pack relative to the previous card, so no other card is touched
+        pack_options = {"fill": "x", "padx": 5, "pady": 5}
+        if index > 0:
+            task_card.pack(after=self.card_pool.cards[tasks[index - 1].id], **pack_options)
+        else:
+            packed = self.tasks_frame.pack_slaves()
+            if packed and packed[0] is not task_card:
+                task_card.pack(before=packed[0], **pack_options)
+            else:
+                task_card.pack(**pack_options)
         
-        # Create stats cards
+        if is_new:
+            self.on_card_bound(task_card)
+            
+            # Apply fade-in animation
+            if animate:
+                task_card.configure(fg_color="transparent")
+                self.animate_fade_in(task_card)
+    
+    def animate_fade_in(self, widget):
+        # CustomTkinter has no opacity control, so the card shows up blank and
+        # gets its priority color after a short delay, with a single timer
+        self.after(200, lambda: self.end_fade_in(widget))
+    
+    def end_fade_in(self, widget):
+        if widget.winfo_exists():
+            widget.configure(fg_color=widget.get_priority_color(widget.task_data.priority, widget.task_data.is_completed))
+    
+    def setup_stats_panel(self):
+        # The stat widgets are built once; refreshes only update their values
         stats_data = [
-            {"label": "Total Tasks", "value": stats["total"], "color": "#3399FF"},
-            {"label": "Completed", "value": stats["completed"], "color": "#33CC33"},
-            {"label": "Due Today", "value": stats["due_today"], "color": "#FFCC00"},
-            {"label": "Overdue", "value": stats["overdue"], "color": "#FF5252"}
+            {"key": "total", "label": "Total Tasks", "color": "#3399FF"},
+            {"key": "completed", "label": "Completed", "color": "#33CC33"},
+            {"key": "due_today", "label": "Due Today", "color": "#FFCC00"},
+            {"key": "overdue", "label": "Overdue", "color": "#FF5252"}
         ]
         
         # Create grid layout for stats
@@ -647,6 +1059,7 @@ class ModernTodoApp(ctk.CTk):
         self.stats_frame.columnconfigure(1, weight=1)
         
         # Create stat cards in a 2x2 grid
+        self.stat_value_labels = {}
         for i, stat in enumerate(stats_data):
             row, col = divmod(i, 2)
             
@@ -655,12 +1068,14 @@ class ModernTodoApp(ctk.CTk):
             stat_card.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
             
             # Value
-            ctk.CTkLabel(
+            value_label = ctk.CTkLabel(
                 stat_card,
-                text=str(stat["value"]),
+                text="0",
                 font=ctk.CTkFont(size=24, weight="bold"),
                 text_color=stat["color"]
-            ).pack(pady=(10, 0))
+            )
+            value_label.pack(pady=(10, 0))
+            self.stat_value_labels[stat["key"]] = value_label
             
             # Label
             ctk.CTkLabel(
@@ -670,41 +1085,211 @@ class ModernTodoApp(ctk.CTk):
             ).pack(pady=(0, 10))
         
         # Progress bar for completion
-        ctk.CTkLabel(
-            self.sidebar,
-            text=f"Completion: {completion_pct:.1f}%",
+        self.completion_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        self.completion_frame.grid(row=4, column=0, padx=20, pady=(10, 10), sticky="ew")
+        self.completion_frame.columnconfigure(0, weight=1)
+        
+        self.completion_label = ctk.CTkLabel(
+            self.completion_frame,
+            text="Completion: 0.0%",
             font=ctk.CTkFont(size=14)
-        ).grid(row=4, column=0, padx=20, pady=(10, 5), sticky="w")
+        )
+        self.completion_label.grid(row=0, column=0, pady=(0, 5), sticky="w")
+        
+        self.progress_bar = ctk.CTkProgressBar(self.completion_frame, height=15)
+        self.progress_bar.grid(row=1, column=0, sticky="ew")
+        self.progress_bar.set(0)
+        
+        # Bind the widgets to the stats counters
+        self.stats = ObservableCounters()
+        self.stats.subscribe(self.on_stats_changed)
+    
+    def on_stats_changed(self, changed, stats):
+        for key, value in changed.items():
+            self.stat_value_labels[key].configure(text=str(value))
+        
+        # Calculate completion percentage
+        if "total" in changed or "completed" in changed:
+            completion_pct = 0 if stats["total"] == 0 else (stats["completed"] / stats["total"]) * 100
+            self.completion_label.configure(text=f"Completion: {completion_pct:.1f}%")
+            self.progress_bar.set(completion_pct / 100)
+    
+    def update_stats(self):
+        # Fresh statistics and facet counts from the reader threads
+        self.stats_generation += 1
+        generation = self.stats_generation
+        include_completed = self.show_completed_var.get()
+        self.task_db.read(
+            "get_stats",
+            callback=lambda stats: self.on_stats_loaded(generation, stats),
+            on_error=self.on_load_error
+        )
+        self.task_db.read(
+            "get_categories",
+            callback=lambda categories: self.task_db.read(
+                "get_facets",
+                include_completed,
+                callback=lambda facets: self.on_facets_loaded(generation, categories, facets),
+                on_error=self.on_load_error
+            ),
+            on_error=self.on_load_error
+        )
+    
+    def on_stats_loaded(self, generation, stats):
+        # Only the values that changed touch the widgets
+        if generation == self.stats_generation:
+            self.stats.update(stats)
+    
+    def setup_facet_panel(self):
+        # Priority and due buckets are fixed; category buttons follow the categories table
+        self.facet_buttons = {}
+        self.facet_categories = []
+        self.active_facets = set()
+        self.category_facets_frame = self.add_facet_section("Category")
+        
+        priority_frame = self.add_facet_section("Priority")
+        for priority in sorted(Priority, key=lambda priority: priority.value, reverse=True):
+            self.add_facet_button(
+                priority_frame, "priority", priority.value,
+                priority.name.title(), f"priority:{priority.name.lower()}"
+            )
+        
+        due_frame = self.add_facet_section("Due")
+        for bucket, label, expression in DUE_FACETS:
+            self.add_facet_button(due_frame, "due", bucket, label, expression)
+    
+    def add_facet_section(self, title):
+        ctk.CTkLabel(
+            self.facets_frame,
+            text=title,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color="#888888"
+        ).pack(anchor="w", padx=5, pady=(5, 0))
+        section = ctk.CTkFrame(self.facets_frame, fg_color="transparent")
+        section.pack(fill="x")
+        return section
+    
+    def add_facet_button(self, parent, field, key, label, expression):
+        button = ctk.CTkButton(
+            parent,
+            text=label,
+            height=24,
+            anchor="w",
+            fg_color="transparent",
+            text_color=("gray10", "gray90"),
+            hover_color=("gray75", "gray30"),
+            command=lambda: self.toggle_facet(field, expression)
+        )
+        button.pack(fill="x", padx=5, pady=1)
+        self.facet_buttons[field, key] = (button, label, expression)
+    
+    def on_facets_loaded(self, generation, categories, facets):
+        # Counts come from one cached GROUP BY; only buttons whose count changed are touched
+        if generation != self.stats_generation:
+            return
         
-        progress_bar = ctk.CTkProgressBar(self.sidebar, height=15)
-        progress_bar.grid(row=4, column=0, padx=20, pady=(0, 10), sticky="ew")
-        progress_bar.set(completion_pct / 100)
+        categories = [name for _, name in categories]
+        if categories != self.facet_categories:
+            for key in [key for key in self.facet_buttons if key[0] == "category"]:
+                self.facet_buttons.pop(key)[0].destroy()
+            for name in categories:
+                expression = f'category:"{name}"' if " " in name else f"category:{name}"
+                self.add_facet_button(self.category_facets_frame, "category", name, name, expression)
+            self.facet_categories = categories
+            self.active_facets = set()
+        
+        for (field, key), (button, label, expression) in self.facet_buttons.items():
+            text = f"{label}  {facets[field].get(key, 0)}"
+            if button.cget("text") != text:
+                button.configure(text=text)
+        self.highlight_facets()
+    
+    def filter_tokens(self, expression):
+        return [match.group().strip() for match in FILTER_TOKEN.finditer(expression)]
+    
+    def highlight_facets(self):
+        # Facets whose filter is in the search box are shown as selected
+        tokens = set(self.filter_tokens(self.search_var.get()))
+        active = {
+            key for key, (button, label, expression) in self.facet_buttons.items()
+            if tokens.issuperset(self.filter_tokens(expression))
+        }
+        for key in active ^ self.active_facets:
+            self.facet_buttons[key][0].configure(
+                fg_color=("#3B8ED0", "#1F6AA5") if key in active else "transparent"
+            )
+        self.active_facets = active
+    
+    def toggle_facet(self, field, expression):
+        # Puts the facet's filter in the search box in place of any other filter on
+        # the same field, or takes it out if it is already there. The search then
+        # runs through filter_tasks and the card diff, not a full rebuild.
+        tokens = self.filter_tokens(self.search_var.get())
+        facet_tokens = self.filter_tokens(expression)
+        selected = set(tokens).issuperset(facet_tokens)
+        tokens = [token for token in tokens if not token.lower().startswith(field + ":")]
+        if not selected:
+            tokens += facet_tokens
+        self.search_var.set(" ".join(tokens))
+        self.search_tasks()
+    
+    def on_search_changed(self, *args):
+        self.highlight_facets()
+        
+        # Search as the user types, once they pause
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(self.SEARCH_DELAY, self.search_tasks)
     
     def search_tasks(self):
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        
         query = self.search_var.get().strip()
         if not query:
+            self.task_db.cancel_search()
+            self.show_filter_error(None)
             self.refresh_tasks()
             return
         
-        # Clear existing task cards
-        for widget in self.tasks_frame.winfo_children():
-            widget.destroy()
-        self.task_cards = {}
-        
-        # Get search results
-        results = self.task_manager.search_tasks(query)
-        
-        # Filter completed tasks if needed
-        if not self.show_completed_var.get():
-            results = [task for task in results if task[5] is None]
-        
-        # Create task cards
-        for i, task in enumerate(results):
-            self.after(i * 30, lambda t=task: self.add_task_card(t))
+        # List loads still in flight would overwrite the results
+        self.list_generation += 1
+        
+        # Runs off the UI thread; a newer search interrupts this one and only
+        # the latest results are applied
+        self.task_db.search(
+            "filter_tasks",
+            query,
+            include_completed=self.show_completed_var.get(),
+            callback=self.on_search_results,
+            on_error=self.on_search_error
+        )
+    
+    def on_search_results(self, tasks):
+        self.show_filter_error(None)
+        self.show_tasks(tasks)
+    
+    def on_search_error(self, error):
+        # An incomplete filter (e.g. "priority:") is usually still being typed,
+        # so keep the current results but say why they don't follow the box.
+        # A failed read is no reason for a dialog in the middle of typing either.
+        if isinstance(error, FilterError):
+            self.show_filter_error(str(error))
+            return
+        logger.error("Search failed", exc_info=error)
+        self.show_filter_error("Search failed, see the log for details")
+    
+    def show_filter_error(self, message):
+        if message:
+            self.filter_error_label.configure(text=message)
+            self.filter_error_label.grid()
+        else:
+            self.filter_error_label.grid_remove()
     
     def clear_search(self):
         self.search_var.set("")
-        self.refresh_tasks()
+        self.search_tasks()
     
     def on_task_select(self, task_id):
         # Update selected task
@@ -716,20 +1301,17 @@ class ModernTodoApp(ctk.CTk):
             self.task_cards[task_id].set_selected(True)
     
     def on_task_complete(self, task_id):
-        task = self.task_manager.get_task(task_id)
-        if not task:
+        # The card on screen has the task's current state
+        if task_id not in self.task_cards:
             return
+        task = self.task_cards[task_id].task_data
         
-        _, _, _, _, _, completed, _, _ = task
-        
-        # Toggle completion status
-        if completed:
-            self.task_manager.uncomplete_task(task_id)
-        else:
-            self.task_manager.complete_task(task_id)
-        
-        # Refresh UI with a cool animation
-        self.animate_refresh()
+        # Toggle completion status; the change event updates the card
+        self.task_db.write(
+            "uncomplete_task" if task.is_completed else "complete_task",
+            task_id,
+            on_error=self.show_db_error
+        )
     
     def on_task_delete(self, task_id):
         # Confirm deletion
@@ -748,8 +1330,11 @@ class ModernTodoApp(ctk.CTk):
                 self.delete_task(task_id)
     
     def delete_task(self, task_id):
-        if self.task_manager.delete_task(task_id):
-            self.refresh_tasks()
+        self.task_db.write(
+            "delete_task",
+            task_id,
+            on_error=self.show_db_error
+        )
     
     def on_task_edit(self, task_id):
         self.show_edit_task_dialog(task_id)
@@ -770,16 +1355,16 @@ class ModernTodoApp(ctk.CTk):
             elif priority == "Critical":
                 priority_enum = Priority.CRITICAL
             
-            task_id = self.task_manager.add_task(
+            # The new card fades in once the change event arrives
+            self.task_db.write(
+                "add_task",
                 title=title,
                 description=description,
                 due_date=due_date,
                 priority=priority_enum,
-                category=category
+                category=category,
+                on_error=self.show_db_error
             )
-            
-            # Refresh the task list with animation
-            self.animate_refresh()
     
     def show_edit_task_dialog(self, task_id=None):
         if task_id is None:
@@ -793,35 +1378,35 @@ class ModernTodoApp(ctk.CTk):
                 return
             task_id = self.selected_task_id
         
-        task = self.task_manager.get_task(task_id)
+        # The card already holds everything but the full description
+        if task_id in self.task_cards:
+            task = self.task_cards[task_id].task_data
+        else:
+            task = self.task_manager.get_task(task_id)
         if not task:
             return
-        
-        task_id, title, desc, created, due, completed, priority, category = task
-        
-        # Format due date for the dialog
-        due_date = None
-        if due:
-            due_date = datetime.datetime.fromisoformat(due.replace("Z", "+00:00"))
+        description = self.task_manager.get_task_description(task_id)
+        if description is None:
+            return
         
         # Map priority value to name
         priority_name = "Medium"
-        if priority == 1:
+        if task.priority == 1:
             priority_name = "Low"
-        elif priority == 3:
+        elif task.priority == 3:
             priority_name = "High"
-        elif priority == 4:
+        elif task.priority == 4:
             priority_name = "Critical"
         
         # Fixed Dialog Window
         dialog = FixedTaskDialog(
             self, 
             "Edit Task",
-            title=title,
-            description=desc or "",
-            due_date=due_date,
+            title=task.title,
+            description=description,
+            due_date=task.due,
             priority=priority_name,
-            category=category
+            category=task.category
         )
         
         if dialog.result:
@@ -835,25 +1420,17 @@ class ModernTodoApp(ctk.CTk):
             elif new_priority == "Critical":
                 priority_enum = Priority.CRITICAL
             
-            self.task_manager.update_task(
+            # Only this card changes (or moves) once the change event arrives
+            self.task_db.write(
+                "update_task",
                 task_id=task_id,
                 title=new_title,
                 description=new_description,
                 due_date=new_due_date,
                 priority=priority_enum,
-                category=new_category
+                category=new_category,
+                on_error=self.show_db_error
             )
-            
-            # Refresh the task list with animation
-            self.animate_refresh()
-    
-    def animate_refresh(self):
-        # Slide out all cards
-        for widget in self.tasks_frame.winfo_children():
-            self.animate_slide_out(widget, None)
-        
-        # After animation delay, refresh the list
-        self.after(300, self.refresh_tasks)
     
     def animate_slide_out(self, widget, callback=None):
         # Animate sliding out to the right
@@ -863,6 +1440,162 @@ class ModernTodoApp(ctk.CTk):
     
     def change_appearance_mode(self, new_appearance_mode):
         ctk.set_appearance_mode(new_appearance_mode)
+    
+    def schedule_checkpoint(self):
+        # Checkpoint the WAL regularly instead of leaving it all to autocheckpoints
+        interval = self.task_manager.storage_settings["checkpoint_interval"]
+        self.after(interval * 1000, self.run_checkpoint)
+    
+    def run_checkpoint(self):
+        # On the writer connection: a TRUNCATE checkpoint waits for readers
+        self.task_db.write("checkpoint")
+        self.schedule_checkpoint()
+    
+    def run_archive(self):
+        # Archives on the writer thread, one batch at a time so user writes get in between
+        self.task_db.write(
+            "archive_completed",
+            max_batches=1,
+            callback=self.on_archived,
+            on_error=self.on_archive_error
+        )
+    
+    def on_archived(self, moved):
+        # A full batch means there may be more to move
+        if moved >= TaskManager.MAX_IN_PARAMS:
+            self.after(100, self.run_archive)
+        else:
+            self.after(self.ARCHIVE_INTERVAL * 1000, self.run_archive)
+        if moved and self.show_completed_var.get():
+            self.refresh_tasks()
+    
+    def on_archive_error(self, error):
+        logger.error("Archiving completed tasks failed", exc_info=error)
+        self.after(self.ARCHIVE_INTERVAL * 1000, self.run_archive)
+    
+    def poll_changes(self):
+        # Other windows, scripts and the HTTP server write to the same file. The
+        # poll is a single PRAGMA while nothing changed; otherwise only the
+        # changed rows are fetched and patched into the list.
+        self.task_db.read(
+            "get_changes",
+            self.revision,
+            callback=self.on_changes,
+            on_error=self.on_poll_error
+        )
+    
+    def on_changes(self, result):
+        # Exactly one next poll is scheduled per poll, whichever way it ends
+        revision, changes = result
+        if changes:
+            # The revision only moves on once the changed rows are read, so
+            # after a failed read the next poll asks for the same changes
+            self.task_db.read(
+                "get_tasks",
+                list(changes),
+                callback=lambda tasks: self.on_changed_tasks(revision, changes, tasks),
+                on_error=self.on_poll_error
+            )
+            return
+        
+        self.revision = revision
+        if changes is None:
+            # The log was pruned past our revision, so start over
+            self.refresh_tasks()
+        self.after(self.CHANGE_POLL_INTERVAL, self.poll_changes)
+    
+    def on_changed_tasks(self, revision, changes, tasks):
+        self.revision = revision
+        self.after(self.CHANGE_POLL_INTERVAL, self.poll_changes)
+        self.apply_task_changes(changes, tasks)
+    
+    def on_poll_error(self, error):
+        logger.error("Checking for database changes failed", exc_info=error)
+        self.after(self.CHANGE_POLL_INTERVAL, self.poll_changes)
+    
+    def on_task_events(self, events):
+        # Our own writes, once committed: only the affected cards and counters
+        # change, nothing is reloaded
+        changes = {}
+        tasks = []
+        for event in events:
+            if isinstance(event, TaskDeleted):
+                changes[event.task_id] = "delete"
+            elif not isinstance(event, CategoryCreated):
+                changes[event.task.id] = "insert" if isinstance(event, TaskAdded) else "update"
+                tasks.append(event.task)
+        
+        if changes:
+            self.apply_task_changes(changes, tasks)
+        else:
+            # New categories only show up in the facet panel
+            self.update_stats()
+    
+    def apply_task_changes(self, changes, tasks):
+        # Patches the rows in changes into the list, from our own change events
+        # or another process's entries in the change log. tasks are the current
+        # rows; ids without one were deleted. A row patched with itself changes
+        # no card, so seeing our own writes again in the log is harmless.
+        if self.search_var.get().strip():
+            # Whether a changed row still matches the search box, text or a
+            # facet's filter, is up to the query, so it runs again
+            self.search_tasks()
+            self.update_stats()
+            return
+        
+        current = {task.id: task for task in tasks}
+        shown = self.virtual_list.rows if self.virtual_list.active else self.shown_tasks
+        if self.show_completed_var.get():
+            rows = self.patch_rows_in_place(shown, changes, current)
+            if rows is None:
+                self.refresh_tasks()
+                return
+        else:
+            open_tasks = [task for task in current.values() if not task.is_completed]
+            # Rows past the last loaded page come with their page. The cursor is
+            # where that page starts, even when the row it was taken from has
+            # since been deleted or moved.
+            last = page_cursor_key(self.page_cursor) if self.virtual_list.active and self.page_cursor else None
+            if last is not None:
+                open_tasks = [task for task in open_tasks if list_order_key(task) <= last]
+            rows = [task for task in shown if task.id not in changes] + open_tasks
+            rows.sort(key=list_order_key)
+        
+        if self.virtual_list.active:
+            self.virtual_list.set_rows(rows)
+        else:
+            self.show_tasks(rows)
+        self.update_stats()
+    
+    def patch_rows_in_place(self, rows, changes, current):
+        # The completed view ends with the archive, whose order can't be rebuilt
+        # here, so changed rows keep their place. Returns None when a change may
+        # add a row or move one: a new row, a new place in the list order, or a
+        # reopened task, which may come back from the archive.
+        shown_ids = {task.id for task in rows}
+        if any(task_id not in shown_ids for task_id in current):
+            return None
+        
+        patched = []
+        for row in rows:
+            if row.id not in changes:
+                patched.append(row)
+                continue
+            task = current.get(row.id)
+            if task is None:
+                continue
+            if list_order_key(task) != list_order_key(row) or (row.is_completed and not task.is_completed):
+                return None
+            patched.append(task)
+        return patched
+    
+    def show_db_error(self, error):
+        messagebox.showerror("Database Error", f"The change could not be saved:\n{error}", parent=self)
+    
+    def on_close(self):
+        self.task_db.shutdown()
+        self.task_manager.close()
+        self.destroy()
 
 
 # FIXED Task Dialog with proper sizing and button functionality
@@ -1014,7 +1747,8 @@ class FixedTaskDialog(ctk.CTkToplevel):
         self.date_time_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
         self.date_time_frame.pack(fill=tk.X, pady=(0, 15))
         
-        # Date entry
+        # Date entry; tkcalendar (and babel behind it) is only imported once a dialog needs it
+        from tkcalendar import DateEntry
         self.date_entry = DateEntry(
             self.date_time_frame,
             width=12,
@@ -1259,6 +1993,7 @@ class FixedTaskDialog(ctk.CTkToplevel):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("FANCY_TODO_LOG_LEVEL", "WARNING"))
     app = ModernTodoApp()
     app.mainloop()
 
@@ -0,0 +1,172 @@
+# Command-line interface over TaskManager for scripts and cron jobs.
+#
+#   python todo_cli.py add "Write report" --due 2024-05-01T17:00 --priority high --category Work
+#   python todo_cli.py list --filter "priority:>=high due:<+3d"
+#   python todo_cli.py search report --all
+#   python todo_cli.py list --filter is:overdue | jq .id | python todo_cli.py complete
+#   python todo_cli.py stats
+#
+# Output is JSON Lines, one object per task or result. complete and delete
+# read ids from stdin when none are given, and add reads JSON Lines tasks from
+# stdin when the title is "-"; each batch runs in a single transaction. Only
+# todo_core is imported, so no GUI module is ever loaded. Task lines carry the
+# description preview that list views use.
+import sys
+import json
+import argparse
+import datetime
+
+from todo_core import Priority, TaskManager, task_from_json, task_to_json
+
+EXIT_NOT_FOUND = 1
+EXIT_USAGE = 2
+
+def write_lines(objects):
+    for obj in objects:
+        sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+def parse_priority(value):
+    try:
+        return Priority[value.upper()]
+    except KeyError:
+        raise argparse.ArgumentTypeError(f"unknown priority: {value}") from None
+
+def parse_due(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date: {value}") from None
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value}") from None
+    if limit < 1:
+        raise argparse.ArgumentTypeError("must be positive")
+    return limit
+
+def read_task_lines(stream):
+    # JSON Lines tasks with the keys title, description, due_date, priority, category
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield task_from_json(json.loads(line))
+        except ValueError as error:
+            raise ValueError(f"stdin line {line_number}: {error}") from None
+
+def read_ids(stream):
+    ids = []
+    for token in stream.read().split():
+        try:
+            ids.append(int(token))
+        except ValueError:
+            raise ValueError(f"not a task id: {token}") from None
+    return ids
+
+def cmd_add(manager, args):
+    if args.title == "-":
+        tasks = list(read_task_lines(sys.stdin))
+    else:
+        task = {"title": args.title, "description": args.description, "priority": args.priority}
+        if args.due:
+            task["due_date"] = args.due
+        if args.category:
+            task["category"] = args.category
+        tasks = [task]
+    
+    task_ids = manager.add_tasks(tasks)
+    write_lines({"id": task_id, "title": task["title"]} for task_id, task in zip(task_ids, tasks))
+    return 0
+
+def cmd_list(manager, args):
+    if args.filter:
+        tasks = manager.filter_tasks(args.filter, include_completed=args.all)
+    else:
+        tasks = manager.iter_tasks(include_completed=args.all)
+    write_lines(task_to_json(task) for task, _ in zip(tasks, range(sys.maxsize if args.limit is None else args.limit)))
+    return 0
+
+def cmd_search(manager, args):
+    tasks = manager.iter_search_tasks(args.query, include_completed=args.all)
+    write_lines(task_to_json(task) for task, _ in zip(tasks, range(sys.maxsize if args.limit is None else args.limit)))
+    return 0
+
+def cmd_complete(manager, args):
+    task_ids = args.ids or read_ids(sys.stdin)
+    results = manager.complete_tasks(task_ids)
+    write_lines({"id": task_id, "completed": found} for task_id, found in zip(task_ids, results))
+    return 0 if all(results) else EXIT_NOT_FOUND
+
+def cmd_delete(manager, args):
+    task_ids = args.ids or read_ids(sys.stdin)
+    results = manager.delete_tasks(task_ids)
+    write_lines({"id": task_id, "deleted": found} for task_id, found in zip(task_ids, results))
+    return 0 if all(results) else EXIT_NOT_FOUND
+
+def cmd_stats(manager, args):
+    write_lines([manager.get_stats()])
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="todo_cli.py", description="Manage Fancy Todo tasks from the command line")
+    parser.add_argument("--db", help="database file (default: ~/.fancy_todo.db)")
+    parser.add_argument("--profile", help="storage profile: durable, balanced or fast")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    add = commands.add_parser("add", help="add a task, or JSON Lines tasks from stdin with -")
+    add.add_argument("title", help='task title, or "-" to read tasks from stdin')
+    add.add_argument("--description", default="")
+    add.add_argument("--due", type=parse_due, help="due date and time in ISO format")
+    add.add_argument("--priority", type=parse_priority, default=Priority.MEDIUM, help="low, medium, high or critical")
+    add.add_argument("--category")
+    add.set_defaults(handler=cmd_add)
+    
+    list_ = commands.add_parser("list", help="list tasks in list order")
+    list_.add_argument("--filter", help='filter expression, e.g. "priority:high due:<+3d"')
+    list_.add_argument("--all", action="store_true", help="include completed and archived tasks")
+    list_.add_argument("--limit", type=parse_limit, help="print at most this many tasks")
+    list_.set_defaults(handler=cmd_list)
+    
+    search = commands.add_parser("search", help="full-text search, best matches first")
+    search.add_argument("query")
+    search.add_argument("--all", action="store_true", help="include completed and archived tasks")
+    search.add_argument("--limit", type=parse_limit, help="print at most this many tasks")
+    search.set_defaults(handler=cmd_search)
+    
+    complete = commands.add_parser("complete", help="complete tasks by id (ids from stdin if none given)")
+    complete.add_argument("ids", type=int, nargs="*")
+    complete.set_defaults(handler=cmd_complete)
+    
+    delete = commands.add_parser("delete", help="delete tasks by id (ids from stdin if none given)")
+    delete.add_argument("ids", type=int, nargs="*")
+    delete.set_defaults(handler=cmd_delete)
+    
+    stats = commands.add_parser("stats", help="task statistics")
+    stats.set_defaults(handler=cmd_stats)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        manager = TaskManager(args.db, args.profile)
+    except ValueError as error:
+        parser.error(str(error))
+    
+    try:
+        return args.handler(manager, args)
+    except ValueError as error:
+        # Bad ids, stdin lines or filter expressions (FilterError)
+        print(f"{parser.prog}: error: {error}", file=sys.stderr)
+        return EXIT_USAGE
+    except BrokenPipeError:
+        # The reader (e.g. head) went away; not an error for a pipeline
+        sys.stderr.close()
+        return 0
+    finally:
+        manager.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1693 @@
+import os
+import time
+import random
+import logging
+import re
+import sqlite3
+import datetime
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+# Define Priority Levels
+class Priority(Enum):
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+def migrate_initial_schema(cursor):
+    # Create tables if they don't exist
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP NOT NULL,
+        due_date TIMESTAMP,
+        completed_at TIMESTAMP,
+        priority INTEGER NOT NULL,
+        category_id INTEGER,
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    )
+    ''')
+    
+    # Insert default categories if they don't exist
+    default_categories = ["Work", "Personal", "Shopping", "Health", "Education"]
+    for category in default_categories:
+        cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,))
+
+def migrate_query_indexes(cursor):
+    # Open tasks in list order (get_all_tasks, search_tasks)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_tasks_open_order
+    ON tasks (priority DESC, due_date) WHERE completed_at IS NULL
+    ''')
+    
+    # All tasks in list order (get_all_tasks with completed tasks)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_order ON tasks (priority DESC, due_date)")
+    
+    # Due date ranges (get_stats due today) and open overdue tasks (get_stats overdue)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due_date)")
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_tasks_open_due
+    ON tasks (due_date) WHERE completed_at IS NULL
+    ''')
+    
+    # Completed tasks (get_stats completed), partial so it never competes for open task queries
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_tasks_completed
+    ON tasks (completed_at) WHERE completed_at IS NOT NULL
+    ''')
+    
+    # Tasks per category; category name lookups already use the UNIQUE index on categories.name
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category_id)")
+
+# Full-text index over task titles and descriptions, kept in sync with tasks by triggers
+FTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    '''
+]
+
+def has_fts5(cursor):
+    # Not every SQLite build ships the FTS5 extension
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def migrate_full_text_search(cursor):
+    # Without FTS5 the search falls back to LIKE queries
+    if not has_fts5(cursor):
+        return
+    
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title,
+        description,
+        content='tasks',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    ''')
+    for trigger in FTS_TRIGGERS:
+        cursor.execute(trigger)
+    
+    # Backfill the index from the existing tasks
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+# Task counts kept up to date by triggers, so get_stats never scans tasks:
+# global counters plus a histogram of tasks per (local) due day
+COUNTER_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_counters_insert AFTER INSERT ON tasks BEGIN
+        UPDATE task_counters SET value = value + 1 WHERE name = 'total';
+        UPDATE task_counters SET value = value + 1
+        WHERE name = 'completed' AND new.completed_at IS NOT NULL;
+        INSERT INTO task_due_days (day, total, open)
+        SELECT date(new.due_date / 1000, 'unixepoch', 'localtime'), 1, new.completed_at IS NULL
+        WHERE new.due_date IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET total = total + 1, open = open + excluded.open;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_counters_delete AFTER DELETE ON tasks BEGIN
+        UPDATE task_counters SET value = value - 1 WHERE name = 'total';
+        UPDATE task_counters SET value = value - 1
+        WHERE name = 'completed' AND old.completed_at IS NOT NULL;
+        UPDATE task_due_days SET total = total - 1, open = open - (old.completed_at IS NULL)
+        WHERE day = date(old.due_date / 1000, 'unixepoch', 'localtime');
+        DELETE FROM task_due_days
+        WHERE day = date(old.due_date / 1000, 'unixepoch', 'localtime') AND total = 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_counters_update AFTER UPDATE OF due_date, completed_at ON tasks BEGIN
+        UPDATE task_counters
+        SET value = value + (new.completed_at IS NOT NULL) - (old.completed_at IS NOT NULL)
+        WHERE name = 'completed';
+        UPDATE task_due_days SET total = total - 1, open = open - (old.completed_at IS NULL)
+        WHERE day = date(old.due_date / 1000, 'unixepoch', 'localtime');
+        DELETE FROM task_due_days
+        WHERE day = date(old.due_date / 1000, 'unixepoch', 'localtime') AND total = 0;
+        INSERT INTO task_due_days (day, total, open)
+        SELECT date(new.due_date / 1000, 'unixepoch', 'localtime'), 1, new.completed_at IS NULL
+        WHERE new.due_date IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET total = total + 1, open = open + excluded.open;
+    END
+    '''
+]
+
+# Counter values computed from scratch, used for the backfill and the consistency check
+ARCHIVE_COUNTER_QUERY = '''
+    UNION ALL
+    SELECT 'archived', COUNT(*) FROM tasks_archive
+    '''
+COUNTER_QUERIES = {
+    "task_counters": '''
+    SELECT 'total', COUNT(*) FROM tasks
+    UNION ALL
+    SELECT 'completed', COUNT(*) FROM tasks WHERE completed_at IS NOT NULL
+    ''' + ARCHIVE_COUNTER_QUERY,
+    "task_due_days": '''
+    SELECT date(due_date / 1000, 'unixepoch', 'localtime'), COUNT(*), SUM(completed_at IS NULL)
+    FROM tasks WHERE due_date IS NOT NULL GROUP BY 1
+    '''
+}
+
+def rebuild_counters(cursor, archive=True):
+    # Migrations from before the archive table (4, 5) count without it
+    task_counters = COUNTER_QUERIES["task_counters"]
+    if not archive:
+        task_counters = task_counters.replace(ARCHIVE_COUNTER_QUERY, "")
+    cursor.execute("DELETE FROM task_counters")
+    cursor.execute("INSERT INTO task_counters (name, value) " + task_counters)
+    cursor.execute("DELETE FROM task_due_days")
+    cursor.execute("INSERT INTO task_due_days (day, total, open) " + COUNTER_QUERIES["task_due_days"])
+
+def migrate_task_counters(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS task_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS task_due_days (
+        day TEXT PRIMARY KEY,
+        total INTEGER NOT NULL,
+        open INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    for trigger in COUNTER_TRIGGERS:
+        cursor.execute(trigger)
+    rebuild_counters(cursor, archive=False)
+
+def epoch_ms_sql(column):
+    # SQL converting a stored naive local ISO timestamp to UTC epoch milliseconds
+    return f"CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+
+def migrate_epoch_timestamps(cursor):
+    # Timestamps become integer UTC epoch milliseconds instead of ISO text, and
+    # ids are never reused after a delete. SQLite can't change column types,
+    # so the table is rebuilt with the same ids.
+    cursor.execute('''
+    CREATE TABLE tasks_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        due_date INTEGER,
+        completed_at INTEGER,
+        priority INTEGER NOT NULL,
+        category_id INTEGER,
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    )
+    ''')
+    cursor.execute(f'''
+    INSERT INTO tasks_new (id, title, description, created_at, due_date, completed_at, priority, category_id)
+    SELECT id, title, description, {epoch_ms_sql("created_at")}, {epoch_ms_sql("due_date")},
+           {epoch_ms_sql("completed_at")}, priority, category_id
+    FROM tasks
+    ''')
+    cursor.execute("DROP TABLE tasks")
+    cursor.execute("ALTER TABLE tasks_new RENAME TO tasks")
+    
+    # Indexes and triggers went away with the old table; the full-text
+    # index keeps its content since the ids and texts didn't change
+    migrate_query_indexes(cursor)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")
+    if cursor.fetchone():
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(trigger)
+    for trigger in COUNTER_TRIGGERS:
+        cursor.execute(trigger)
+    rebuild_counters(cursor, archive=False)
+
+# Tasks completed long ago move to tasks_archive (TaskManager.archive_completed),
+# which keeps their ids; its own full-text index keeps them searchable
+ARCHIVE_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_counters_insert AFTER INSERT ON tasks_archive BEGIN
+        UPDATE task_counters SET value = value + 1 WHERE name = 'archived';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_counters_delete AFTER DELETE ON tasks_archive BEGIN
+        UPDATE task_counters SET value = value - 1 WHERE name = 'archived';
+    END
+    '''
+]
+ARCHIVE_FTS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_insert AFTER INSERT ON tasks_archive BEGIN
+        INSERT INTO tasks_archive_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_delete AFTER DELETE ON tasks_archive BEGIN
+        INSERT INTO tasks_archive_fts (tasks_archive_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_fts_update AFTER UPDATE OF title, description ON tasks_archive BEGIN
+        INSERT INTO tasks_archive_fts (tasks_archive_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_archive_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    '''
+]
+
+def migrate_task_archive(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tasks_archive (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        created_at INTEGER NOT NULL,
+        due_date INTEGER,
+        completed_at INTEGER NOT NULL,
+        priority INTEGER NOT NULL,
+        category_id INTEGER,
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    )
+    ''')
+    
+    # The completed view pages the archive newest first
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_archive_completed ON tasks_archive (completed_at)")
+    
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")
+    if cursor.fetchone():
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_archive_fts USING fts5(
+            title,
+            description,
+            content='tasks_archive',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        ''')
+        for trigger in ARCHIVE_FTS_TRIGGERS:
+            cursor.execute(trigger)
+    for trigger in ARCHIVE_TRIGGERS:
+        cursor.execute(trigger)
+    rebuild_counters(cursor)
+
+# Append-only log of task changes. Its sequence is a global revision number
+# (HTTP ETags), and other processes read it to see which tasks changed.
+# Archiving and restoring copy a task into the other table before deleting
+# it from this one; the copy is logged as an update and the delete not at
+# all, since the task still exists.
+def change_log_trigger(table, kind):
+    other = "tasks_archive" if table == "tasks" else "tasks"
+    condition = ""
+    logged = f"'{kind}'"
+    if kind == "insert":
+        logged = f"CASE WHEN EXISTS (SELECT 1 FROM {other} WHERE id = new.id) THEN 'update' ELSE 'insert' END"
+    elif kind == "delete":
+        condition = f"\n    WHEN NOT EXISTS (SELECT 1 FROM {other} WHERE id = old.id)"
+    return f'''
+    CREATE TRIGGER IF NOT EXISTS {table}_changes_{kind} AFTER {kind.upper()} ON {table}{condition} BEGIN
+        INSERT INTO task_changes (task_id, kind, changed_at)
+        VALUES ({"old" if kind == "delete" else "new"}.id, {logged},
+                CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER));
+    END
+    '''
+
+CHANGE_LOG_TRIGGERS = [
+    change_log_trigger(table, kind)
+    for table in ("tasks", "tasks_archive")
+    for kind in ("insert", "update", "delete")
+]
+
+def migrate_change_log(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS task_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        changed_at INTEGER NOT NULL
+    )
+    ''')
+    for trigger in CHANGE_LOG_TRIGGERS:
+        cursor.execute(trigger)
+
+def migrate_change_log_moves(cursor):
+    # Version 7 logged archived and restored tasks as deleted
+    for table in ("tasks", "tasks_archive"):
+        for kind in ("insert", "update", "delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_changes_{kind}")
+    for trigger in CHANGE_LOG_TRIGGERS:
+        cursor.execute(trigger)
+
+MIGRATIONS = [
+    (1, migrate_initial_schema),
+    (2, migrate_query_indexes),
+    (3, migrate_full_text_search),
+    (4, migrate_task_counters),
+    (5, migrate_epoch_timestamps),
+    (6, migrate_task_archive),
+    (7, migrate_change_log),
+    (8, migrate_change_log_moves),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn):
+    # Bring an existing database up to SCHEMA_VERSION, one migration per transaction
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Another process may have run it while we waited for the write lock
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if target <= version:
+                conn.commit()
+                continue
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+    return version
+
+# Storage profiles trading commit latency against durability. Pick one with
+# the FANCY_TODO_STORAGE_PROFILE environment variable or TaskManager(profile=...).
+STORAGE_PROFILES = {
+    # Every commit is fsynced, checkpoints truncate the WAL
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,  # KiB
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1000,  # pages
+        "checkpoint": "TRUNCATE",
+        "checkpoint_interval": 60  # seconds
+    },
+    # Commits only fsync at checkpoints; a power loss can drop the last commits but never corrupts
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+        "checkpoint": "PASSIVE",
+        "checkpoint_interval": 300
+    },
+    # No fsync at all; an OS crash or power loss can corrupt the database
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+        "checkpoint": "PASSIVE",
+        "checkpoint_interval": 600
+    }
+}
+DEFAULT_STORAGE_PROFILE = "balanced"
+STORAGE_PRAGMAS = ["journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "wal_autocheckpoint"]
+
+def get_storage_profile(profile=None):
+    name = profile or os.environ.get("FANCY_TODO_STORAGE_PROFILE") or DEFAULT_STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile {name!r}, expected one of {', '.join(STORAGE_PROFILES)}")
+    return name, STORAGE_PROFILES[name]
+
+def apply_storage_profile(conn, settings):
+    for pragma in STORAGE_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+
+def storage_report(conn):
+    # Effective values, which can differ from the profile (e.g. no WAL on some filesystems)
+    return {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in STORAGE_PRAGMAS}
+
+# Database Setup
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".fancy_todo.db")
+
+# Milliseconds a connection waits for another connection's lock before SQLite
+# reports "database is locked"
+BUSY_TIMEOUT = 5000
+
+def init_database(db_path=None, profile=None):
+    conn = sqlite3.connect(db_path or DEFAULT_DB_PATH, timeout=BUSY_TIMEOUT / 1000)
+    apply_storage_profile(conn, get_storage_profile(profile)[1])
+    migrate(conn)
+    return conn
+
+# Full-text search queries
+def build_fts_query(text):
+    # Turns user input into an FTS5 query: "quoted phrases" stay phrases, a
+    # trailing * marks a prefix, and the last word always matches as a prefix
+    # so results show up while typing. Every term is quoted, so user input
+    # can never produce an FTS5 syntax error.
+    terms = []
+    for i, part in enumerate(text.split('"')):
+        if i % 2 == 1:
+            if part.strip():
+                terms.append('"' + part.strip() + '"')
+            continue
+        for word in part.split():
+            prefix = word.endswith("*")
+            word = word.rstrip("*")
+            if word:
+                terms.append('"' + word + '"' + ("*" if prefix else ""))
+    
+    if not terms:
+        return None
+    if not text.rstrip().endswith(('"', "*")) and not terms[-1].endswith("*"):
+        terms[-1] += "*"
+    return " ".join(terms)
+
+# Task records
+TASK_FIELDS = ("id", "title", "description", "created_at", "due_date", "completed_at", "priority", "category")
+TASK_COLUMNS = "t.id, t.title, t.description, t.created_at, t.due_date, t.completed_at, t.priority, c.name"
+
+# List views only show the start of a description, so they fetch a preview cut in SQL
+# and the full text is loaded on demand (TaskManager.get_task_description)
+DESCRIPTION_PREVIEW_LENGTH = 100
+DESCRIPTION_PREVIEW = (
+    f"CASE WHEN length(t.description) > {DESCRIPTION_PREVIEW_LENGTH} "
+    f"THEN substr(t.description, 1, {DESCRIPTION_PREVIEW_LENGTH - 3}) || '...' "
+    "ELSE t.description END"
+)
+TASK_LIST_COLUMNS = f"t.id, t.title, {DESCRIPTION_PREVIEW}, t.created_at, t.due_date, t.completed_at, t.priority, c.name"
+
+# Tasks live in the tasks table until archived, then in tasks_archive with the same columns
+TASK_TABLES = ("tasks", "tasks_archive")
+TASK_TABLE_COLUMNS = "id, title, description, created_at, due_date, completed_at, priority, category_id"
+
+# Timestamps are stored as UTC epoch milliseconds; the app works with naive local datetimes
+def to_epoch_ms(value):
+    if value is None:
+        return None
+    return round(value.timestamp() * 1000)
+
+def from_epoch_ms(value):
+    if value is None:
+        return None
+    return datetime.datetime.fromtimestamp(value / 1000)
+
+def now_epoch_ms():
+    return time.time_ns() // 1_000_000
+
+_UNPARSED = object()
+
+# Compact task record with named fields, built directly by the row factory.
+# Timestamps stay epoch milliseconds until first used as datetimes, then the
+# converted value is cached.
+class Task:
+    __slots__ = TASK_FIELDS + ("_due", "_created", "_completed")
+    
+    def __init__(self, id, title, description, created_at, due_date, completed_at, priority, category):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.created_at = created_at
+        self.due_date = due_date
+        self.completed_at = completed_at
+        self.priority = priority
+        self.category = category
+        self._due = self._created = self._completed = _UNPARSED
+    
+    @classmethod
+    def from_row(cls, cursor, row):
+        # sqlite3 row factory
+        return cls(*row)
+    
+    @property
+    def due(self):
+        if self._due is _UNPARSED:
+            self._due = from_epoch_ms(self.due_date)
+        return self._due
+    
+    @property
+    def created(self):
+        if self._created is _UNPARSED:
+            self._created = from_epoch_ms(self.created_at)
+        return self._created
+    
+    @property
+    def completed(self):
+        if self._completed is _UNPARSED:
+            self._completed = from_epoch_ms(self.completed_at)
+        return self._completed
+    
+    @property
+    def is_completed(self):
+        return self.completed_at is not None
+    
+    @property
+    def is_overdue(self):
+        # Compared in epoch milliseconds, no datetime needed
+        return self.completed_at is None and self.due_date is not None and self.due_date < now_epoch_ms()
+    
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in TASK_FIELDS)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"Task(id={self.id!r}, title={self.title!r}, priority={self.priority!r}, category={self.category!r})"
+
+def list_order_key(task):
+    # Sort key matching the SQL list order: priority DESC, due_date ASC with
+    # NULLs first, id ASC
+    return (-task.priority, task.due_date is not None, task.due_date or 0, task.id)
+
+def page_cursor_key(cursor):
+    # list_order_key of the row a get_tasks_page cursor points after; None for
+    # archive cursors, which come after every row of the tasks table
+    if cursor[0] == "archive":
+        return None
+    priority, due_date, task_id = cursor
+    return (-priority, due_date is not None, due_date or 0, task_id)
+
+# JSON form of tasks, shared by the command line and the HTTP API:
+# ISO local timestamps and lower-case priority names
+def task_to_json(task):
+    def timestamp(value):
+        return value.isoformat(timespec="seconds") if value else None
+    
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "created_at": timestamp(task.created),
+        "due_date": timestamp(task.due),
+        "completed_at": timestamp(task.completed),
+        "priority": Priority(task.priority).name.lower(),
+        "category": task.category
+    }
+
+def task_from_json(fields, partial=False):
+    # add_task/update_task keyword arguments from a JSON object; title is
+    # required unless partial. Raises ValueError on bad fields.
+    if not isinstance(fields, dict):
+        raise ValueError("a task must be a JSON object")
+    unknown = fields.keys() - {"title", "description", "due_date", "priority", "category"}
+    if unknown:
+        raise ValueError(f"unknown task fields: {', '.join(sorted(unknown))}")
+    if not partial and not fields.get("title"):
+        raise ValueError("title is required")
+    
+    task = {}
+    for key in ("title", "description", "category"):
+        if fields.get(key) is not None:
+            if not isinstance(fields[key], str):
+                raise ValueError(f"{key} must be a string")
+            task[key] = fields[key]
+    if fields.get("due_date"):
+        try:
+            task["due_date"] = datetime.datetime.fromisoformat(fields["due_date"])
+        except (TypeError, ValueError):
+            raise ValueError(f"due_date is not an ISO date: {fields['due_date']}") from None
+    if fields.get("priority"):
+        try:
+            task["priority"] = Priority[str(fields["priority"]).upper()]
+        except KeyError:
+            raise ValueError(f"unknown priority: {fields['priority']}") from None
+    return task
+
+# Filter expressions, e.g. priority:>=high category:Work due:<+3d "weekly report"
+#
+#   priority:high  priority:>=high  priority:low,medium
+#   category:Work  category:Work,Personal
+#   due:today  due:<+3d  due:>=2024-05-01  due:none    (days: today, tomorrow,
+#                                                      yesterday, +3d, -1w, ISO dates)
+#   is:open  is:done  is:overdue
+#   anything else is full-text search, including unknown field: prefixes;
+#   a leading - negates any term
+class FilterError(ValueError):
+    pass
+
+# Parsed terms; an expression matches the tasks that match all of its terms
+TextFilter = namedtuple("TextFilter", "text negate")
+PriorityFilter = namedtuple("PriorityFilter", "op values negate")
+CategoryFilter = namedtuple("CategoryFilter", "names negate")
+# start <= due_date < end in epoch ms, either bound may be None; both None means no due date
+DueFilter = namedtuple("DueFilter", "start end negate")
+StatusFilter = namedtuple("StatusFilter", "status negate")
+
+FILTER_TOKEN = re.compile(r'\s*(-?)(?:([A-Za-z]+):("[^"]*"?|\S*)|("[^"]*"?|\S+))')
+FILTER_OPERATORS = ("<=", ">=", "<", ">", "=")
+FILTER_STATUSES = {"open": "open", "done": "done", "completed": "done", "overdue": "overdue"}
+RELATIVE_DAY = re.compile(r"([+-]?)(\d+)([dw])")
+NAMED_DAYS = {"yesterday": -1, "today": 0, "tomorrow": 1}
+
+# Due date facets in display order: bucket, label, the filter expression selecting it
+DUE_FACETS = (
+    ("past", "Before today", "due:<today"),
+    ("today", "Today", "due:today"),
+    ("week", "Next 7 days", "due:>today due:<+7d"),
+    ("later", "Later", "due:>=+7d"),
+    ("none", "No due date", "due:none")
+)
+
+def tokenize_filter(expression):
+    # Yields (negate, field, value) tuples; field is None for free text
+    for match in FILTER_TOKEN.finditer(expression):
+        negate, field, value, text = match.groups()
+        if field is not None:
+            yield bool(negate), field.lower(), value.strip('"')
+        elif text is not None:
+            yield bool(negate), None, text
+
+def _split_operator(value):
+    for op in FILTER_OPERATORS:
+        if value.startswith(op):
+            return op, value[len(op):]
+    return "=", value
+
+def _filter_values(field, value):
+    values = [part.strip() for part in value.split(",") if part.strip()]
+    if not values:
+        raise FilterError(f"{field}: needs a value")
+    return values
+
+def _parse_priority(value):
+    try:
+        return Priority[value.upper()].value
+    except KeyError:
+        pass
+    if value.isdigit() and int(value) in {priority.value for priority in Priority}:
+        return int(value)
+    raise FilterError(f"Unknown priority: {value}")
+
+def _parse_day(value, now):
+    # Returns the epoch ms bounds of a local calendar day
+    value = value.lower()
+    today = now.date()
+    relative = RELATIVE_DAY.fullmatch(value)
+    if value in NAMED_DAYS:
+        day = today + datetime.timedelta(days=NAMED_DAYS[value])
+    elif relative:
+        sign, count, unit = relative.groups()
+        days = int(count) * (7 if unit == "w" else 1)
+        day = today + datetime.timedelta(days=-days if sign == "-" else days)
+    else:
+        try:
+            day = datetime.date.fromisoformat(value)
+        except ValueError:
+            raise FilterError(f"Unknown date: {value}") from None
+    start = datetime.datetime.combine(day, datetime.time.min)
+    end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min)
+    return to_epoch_ms(start), to_epoch_ms(end)
+
+def parse_filter(expression, now=None):
+    # Turns a filter expression into a list of typed terms; raises FilterError
+    now = now or datetime.datetime.now()
+    terms = []
+    for negate, field, value in tokenize_filter(expression):
+        if field is None:
+            if value.strip('"*-'):
+                terms.append(TextFilter(value, negate))
+        elif field == "priority":
+            op, value = _split_operator(value)
+            values = tuple(_parse_priority(part) for part in _filter_values(field, value))
+            if op != "=" and len(values) > 1:
+                raise FilterError(f"priority:{op} takes a single value")
+            terms.append(PriorityFilter(op, values, negate))
+        elif field == "category":
+            terms.append(CategoryFilter(tuple(_filter_values(field, value)), negate))
+        elif field == "due":
+            op, value = _split_operator(value)
+            if value.lower() == "none" and op == "=":
+                terms.append(DueFilter(None, None, negate))
+                continue
+            start, end = _parse_day(_filter_values(field, value)[0], now)
+            bounds = {"=": (start, end), "<": (None, start), "<=": (None, end), ">": (end, None), ">=": (start, None)}
+            terms.append(DueFilter(*bounds[op], negate))
+        elif field == "is":
+            status = FILTER_STATUSES.get(value.lower())
+            if status is None:
+                raise FilterError(f"Unknown status: {value}")
+            terms.append(StatusFilter(status, negate))
+        else:
+            # Not a filter, just text with a colon: "Re: budget", URLs, times
+            terms.append(TextFilter(f"{field}:{value}", negate))
+    return terms
+
+def _filter_condition(term, fts, now_ms, table="tasks"):
+    # SQL condition and parameters for one term, written so the indexes on tasks apply
+    if isinstance(term, TextFilter):
+        if fts:
+            return f"t.id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)", [build_fts_query(term.text)]
+        text = "%" + term.text.strip('"*') + "%"
+        return "(t.title LIKE ? OR t.description LIKE ?)", [text, text]
+    if isinstance(term, PriorityFilter):
+        if term.op == "=":
+            return f"t.priority IN ({', '.join(['?'] * len(term.values))})", list(term.values)
+        return f"t.priority {term.op} ?", list(term.values)
+    if isinstance(term, CategoryFilter):
+        placeholders = ", ".join(["?"] * len(term.names))
+        return (
+            f"t.category_id IN (SELECT id FROM categories WHERE name COLLATE NOCASE IN ({placeholders}))",
+            list(term.names)
+        )
+    if isinstance(term, DueFilter):
+        if term.start is None and term.end is None:
+            return "t.due_date IS NULL", []
+        conditions, parameters = [], []
+        if term.start is not None:
+            conditions.append("t.due_date >= ?")
+            parameters.append(term.start)
+        if term.end is not None:
+            conditions.append("t.due_date < ?")
+            parameters.append(term.end)
+        return " AND ".join(conditions), parameters
+    if term.status == "open":
+        return "t.completed_at IS NULL", []
+    if term.status == "done":
+        return "t.completed_at IS NOT NULL", []
+    return "t.completed_at IS NULL AND t.due_date < ?", [now_ms]
+
+def compile_filter(terms, include_completed=True, fts=True, now=None, table="tasks"):
+    # Compiles parsed terms into one parameterized query over table (tasks or
+    # tasks_archive). Positive text terms become a single FTS5 MATCH ranked by
+    # bm25, everything else a WHERE condition.
+    now_ms = to_epoch_ms(now or datetime.datetime.now())
+    conditions, parameters = [], []
+    text = [term.text for term in terms if isinstance(term, TextFilter) and not term.negate]
+    fts_query = build_fts_query(" ".join(text)) if fts and text else None
+    
+    for term in terms:
+        if fts and isinstance(term, TextFilter) and not term.negate:
+            continue
+        condition, term_parameters = _filter_condition(term, fts, now_ms, table)
+        if term.negate:
+            # Tasks without a due date don't match due:... so -due:... includes them
+            condition = f"({condition}) IS NOT 1"
+        conditions.append(condition)
+        parameters.extend(term_parameters)
+    
+    # The "Show Completed" setting only applies when the expression doesn't pick a status
+    if not include_completed and not any(isinstance(term, StatusFilter) for term in terms):
+        conditions.append("t.completed_at IS NULL")
+    
+    if fts_query is not None:
+        query = f'''
+        SELECT {TASK_LIST_COLUMNS}
+        FROM {table}_fts f
+        JOIN {table} t ON t.id = f.rowid
+        JOIN categories c ON t.category_id = c.id
+        WHERE {table}_fts MATCH ?'''
+        parameters.insert(0, fts_query)
+        order = f"bm25({table}_fts, ?, ?)"
+        parameters.extend(TaskManager.SEARCH_WEIGHTS)
+    else:
+        query = f'''
+        SELECT {TASK_LIST_COLUMNS}
+        FROM {table} t
+        JOIN categories c ON t.category_id = c.id
+        WHERE 1'''
+        order = "t.priority DESC, t.due_date ASC"
+    
+    for condition in conditions:
+        query += f"\n        AND {condition}"
+    return query + f"\n        ORDER BY {order}", parameters
+
+# Change events, published by TaskManager after the transaction that caused
+# them commits. Tasks are the rows after the change, as list queries return
+# them (description preview); changed holds the TASK_FIELDS names written.
+TaskAdded = namedtuple("TaskAdded", ["task"])
+TaskUpdated = namedtuple("TaskUpdated", ["task", "changed"])
+TaskCompleted = namedtuple("TaskCompleted", ["task"])
+TaskDeleted = namedtuple("TaskDeleted", ["task_id"])
+CategoryCreated = namedtuple("CategoryCreated", ["category_id", "name"])
+
+def changed_fields(assignments):
+    # TASK_FIELDS names for the "column = ?" assignments of an UPDATE
+    fields = []
+    for assignment in assignments:
+        column = assignment.split(" = ")[0]
+        fields.append("category" if column == "category_id" else column)
+    return tuple(fields)
+
+# Task Management
+class TaskManager:
+    # bm25 weights for the title and description columns
+    SEARCH_WEIGHTS = (10.0, 1.0)
+    
+    # Largest number of ids bound into a single IN (...) list
+    MAX_IN_PARAMS = 500
+    
+    # Tasks completed more than this many days ago are moved to the archive
+    ARCHIVE_AFTER_DAYS = 30
+    
+    # Entries of the change log older than this many days are pruned, by the
+    # transaction that logs every CHANGE_LOG_PRUNE_EVERY-th change
+    CHANGE_LOG_DAYS = 7
+    CHANGE_LOG_PRUNE_EVERY = 1000
+    
+    # Further attempts to take the write lock once the busy timeout ran out, and
+    # the first pause between them in seconds (doubled after every attempt)
+    WRITE_RETRIES = 3
+    RETRY_DELAY = 0.05
+    
+    def __init__(self, db_path=None, profile=None):
+        self.profile, self.storage_settings = get_storage_profile(profile)
+        self.conn = init_database(db_path, self.profile)
+        self.cursor = self.conn.cursor()
+        
+        # Task queries go through their own cursor, which builds Task records
+        self.task_cursor = self.conn.cursor()
+        self.task_cursor.row_factory = Task.from_row
+        self._transaction_depth = 0
+        self._begin_revision = 0
+        
+        # Report what SQLite actually runs with
+        self.storage_report = storage_report(self.conn)
+        logger.info("Storage profile %s: %s", self.profile, self.storage_report)
+        
+        # The full-text index only exists if SQLite was built with FTS5
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")
+        self.has_fts = self.cursor.fetchone() is not None
+        
+        # In-process category cache, name -> id and id -> name
+        self.load_categories()
+        
+        # (cache key, facets) of the last get_facets call
+        self._facets = None
+        
+        # Cache key of the last get_changes call that found nothing new
+        self._changes_key = None
+        
+        # Change event subscribers, and the events of the open transaction
+        self.subscribers = []
+        self._events = []
+    
+    @contextmanager
+    def transaction(self):
+        # Groups writes into a single commit; nested scopes join the outer one.
+        # The outermost scope takes the write lock up front, so a write that
+        # reads first can't fail halfway when another process writes meanwhile.
+        if self._transaction_depth == 0:
+            self._begin()
+        self._transaction_depth += 1
+        try:
+            yield self.cursor
+            if self._transaction_depth == 1:
+                self._prune_changes_if_due()
+                self.conn.commit()
+        except BaseException:
+            if self._transaction_depth == 1:
+                self.conn.rollback()
+                self._events = []
+                # Categories created by the rolled back transaction are gone again
+                self.load_categories()
+            raise
+        finally:
+            self._transaction_depth -= 1
+        
+        # Subscribers only hear about committed changes, once per transaction
+        if self._transaction_depth == 0 and self._events:
+            events, self._events = self._events, []
+            for callback in self.subscribers:
+                callback(events)
+    
+    def subscribe(self, callback):
+        # callback(events) gets the change events of every transaction this
+        # connection commits, on the thread that committed it
+        self.subscribers.append(callback)
+    
+    def _publish_tasks(self, event_type, task_ids, **fields):
+        # Queues an event per task with its current row; without subscribers
+        # the rows aren't even read
+        if self.subscribers:
+            self._events.extend(event_type(task, **fields) for task in self.get_tasks(task_ids))
+    
+    def _begin(self):
+        # BEGIN IMMEDIATE waits up to BUSY_TIMEOUT for the write lock. Another
+        # process holding it longer (a large import) gets a few more chances,
+        # with a randomized pause so waiting writers don't retry in lockstep.
+        delay = self.RETRY_DELAY
+        for attempt in range(self.WRITE_RETRIES + 1):
+            try:
+                self.cursor.execute("BEGIN IMMEDIATE")
+                self._begin_revision = self.get_revision()
+                return
+            except sqlite3.OperationalError as error:
+                if "locked" not in str(error) or attempt == self.WRITE_RETRIES:
+                    raise
+                logger.warning("Database is locked, retrying (attempt %d)", attempt + 1)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay *= 2
+    
+    def checkpoint(self, mode=None):
+        # Copy the WAL back into the database file, using the profile's mode by default.
+        # Returns (busy, wal pages, pages checkpointed).
+        mode = mode or self.storage_settings["checkpoint"]
+        self.cursor.execute(f"PRAGMA wal_checkpoint({mode})")
+        return self.cursor.fetchone()
+    
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+    
+    def load_categories(self):
+        self.cursor.execute("SELECT id, name FROM categories")
+        rows = self.cursor.fetchall()
+        self.category_ids = {name: category_id for category_id, name in rows}
+        self.category_names = {category_id: name for category_id, name in rows}
+        self._data_version = self._get_data_version()
+    
+    def _get_data_version(self):
+        # Changes whenever another connection commits to the database
+        self.cursor.execute("PRAGMA data_version")
+        return self.cursor.fetchone()[0]
+    
+    def _sync_categories(self):
+        # Other connections (the background writer, other processes) may have added categories
+        if self._get_data_version() != self._data_version:
+            self.load_categories()
+    
+    def _get_category_id(self, category):
+        # Get category id from the cache, creating the category if needed
+        category_id = self.category_ids.get(category)
+        if category_id is None:
+            category_id = self.resolve_categories([category])[category]
+        return category_id
+    
+    def resolve_categories(self, names):
+        # Bulk name -> id resolution; every missing category is created with one
+        # INSERT per chunk of names instead of one round-trip per task
+        missing = list({name for name in names if name not in self.category_ids})
+        if missing:
+            with self.transaction():
+                for i in range(0, len(missing), self.MAX_IN_PARAMS):
+                    chunk = missing[i:i + self.MAX_IN_PARAMS]
+                    values = ", ".join(["(?)"] * len(chunk))
+                    self.cursor.execute(f"INSERT OR IGNORE INTO categories (name) VALUES {values}", chunk)
+                    
+                    # Some may have been created by another connection in the meantime.
+                    # We hold the write lock, so the rows inserted here got consecutive
+                    # ids up to lastrowid.
+                    first_created = self.cursor.lastrowid - self.cursor.rowcount + 1 if self.cursor.rowcount else None
+                    placeholders = ", ".join("?" * len(chunk))
+                    self.cursor.execute(f"SELECT id, name FROM categories WHERE name IN ({placeholders})", chunk)
+                    for category_id, name in self.cursor.fetchall():
+                        self.category_ids[name] = category_id
+                        self.category_names[category_id] = name
+                        if first_created is not None and category_id >= first_created and self.subscribers:
+                            self._events.append(CategoryCreated(category_id, name))
+        return {name: self.category_ids[name] for name in names}
+    
+    def _existing_task_ids(self, task_ids, table="tasks"):
+        # Which of task_ids exist, queried in chunks to stay under the parameter limit
+        task_ids = list(task_ids)
+        existing = set()
+        for i in range(0, len(task_ids), self.MAX_IN_PARAMS):
+            chunk = task_ids[i:i + self.MAX_IN_PARAMS]
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in self.cursor.fetchall())
+        return existing
+    
+    def add_task(self, title, description="", due_date=None, priority=Priority.MEDIUM, category="Personal"):
+        with self.transaction():
+            category_id = self._get_category_id(category)
+            
+            # Add task
+            self.cursor.execute('''
+            INSERT INTO tasks (title, description, created_at, due_date, priority, category_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (title, description, now_epoch_ms(), to_epoch_ms(due_date), priority.value, category_id))
+            task_id = self.cursor.lastrowid
+            self._publish_tasks(TaskAdded, [task_id])
+            return task_id
+    
+    def add_tasks(self, tasks):
+        # Bulk add_task: tasks is an iterable of dicts with add_task's keyword
+        # arguments. Returns the new task ids in order, all in one transaction.
+        now = now_epoch_ms()
+        tasks = list(tasks)
+        with self.transaction():
+            category_ids = self.resolve_categories({task.get("category", "Personal") for task in tasks})
+            rows = []
+            for task in tasks:
+                rows.append((
+                    task["title"],
+                    task.get("description", ""),
+                    now,
+                    to_epoch_ms(task.get("due_date")),
+                    task.get("priority", Priority.MEDIUM).value,
+                    category_ids[task.get("category", "Personal")]
+                ))
+            if not rows:
+                return []
+            
+            # The first insert takes the write lock, after which SQLite hands
+            # out consecutive rowids, so the ids of the rest follow from it
+            query = '''
+            INSERT INTO tasks (title, description, created_at, due_date, priority, category_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            '''
+            self.cursor.execute(query, rows[0])
+            first_id = self.cursor.lastrowid
+            self.cursor.executemany(query, rows[1:])
+            task_ids = list(range(first_id, first_id + len(rows)))
+            self._publish_tasks(TaskAdded, task_ids)
+            return task_ids
+    
+    def get_all_tasks(self, include_completed=False):
+        query = f'''
+        SELECT {TASK_LIST_COLUMNS}
+        FROM tasks t
+        JOIN categories c ON t.category_id = c.id
+        '''
+        if not include_completed:
+            query += " WHERE t.completed_at IS NULL"
+        query += " ORDER BY t.priority DESC, t.due_date ASC, t.id ASC"
+        
+        self.task_cursor.execute(query)
+        tasks = self.task_cursor.fetchall()
+        
+        # Archived tasks follow, most recently completed first (a negative LIMIT means no limit)
+        if include_completed:
+            tasks += self._get_archive_page(None, -1)[0]
+        return tasks
+    
+    def count_tasks(self, include_completed=False):
+        counters = self._get_counters()
+        if include_completed:
+            return counters["total"] + counters["archived"]
+        return counters["total"] - counters["completed"]
+    
+    def _get_counters(self):
+        self.cursor.execute("SELECT name, value FROM task_counters")
+        return dict(self.cursor.fetchall())
+    
+    def get_tasks_page(self, include_completed=False, after=None, limit=100):
+        # Keyset pagination over the list order (priority DESC, due_date ASC, id ASC).
+        # after is the cursor returned with the previous page; the returned cursor
+        # is None once the last page has been read. Every step is an index seek,
+        # so deep pages cost the same as the first one. With include_completed the
+        # archive is paged after the tasks table, see _get_archive_page.
+        if after is not None and after[0] == "archive":
+            return self._get_archive_page(after[1:], limit)
+        
+        if after is None:
+            segments = [("1", ())]
+        else:
+            # Rows after the cursor: the rest of its priority, then lower priorities.
+            # NULL due dates sort first within a priority.
+            priority, due_date, task_id = after
+            if due_date is None:
+                segments = [
+                    ("t.priority = ? AND t.due_date IS NULL AND t.id > ?", (priority, task_id)),
+                    ("t.priority = ? AND t.due_date IS NOT NULL", (priority,))
+                ]
+            else:
+                segments = [("t.priority = ? AND (t.due_date, t.id) > (?, ?)", (priority, due_date, task_id))]
+            segments.append(("t.priority < ?", (priority,)))
+        
+        rows = []
+        for condition, parameters in segments:
+            query = f'''
+            SELECT {TASK_LIST_COLUMNS}
+            FROM tasks t
+            JOIN categories c ON t.category_id = c.id
+            WHERE ''' + condition
+            if not include_completed:
+                query += " AND t.completed_at IS NULL"
+            query += " ORDER BY t.priority DESC, t.due_date ASC, t.id ASC LIMIT ?"
+            
+            self.task_cursor.execute(query, (*parameters, limit - len(rows)))
+            rows.extend(self.task_cursor.fetchall())
+            if len(rows) >= limit:
+                last = rows[-1]
+                return rows, (last.priority, last.due_date, last.id)
+        
+        if include_completed:
+            archived, cursor = self._get_archive_page(None, limit - len(rows))
+            return rows + archived, cursor
+        return rows, None
+    
+    def _get_archive_page(self, after=None, limit=100):
+        # Archived tasks, most recently completed first; cursors are ("archive", completed_at, id)
+        query = f'''
+        SELECT {TASK_LIST_COLUMNS}
+        FROM tasks_archive t
+        JOIN categories c ON t.category_id = c.id
+        '''
+        parameters = []
+        if after is not None:
+            query += " WHERE (t.completed_at, t.id) < (?, ?)"
+            parameters.extend(after)
+        query += " ORDER BY t.completed_at DESC, t.id DESC LIMIT ?"
+        
+        self.task_cursor.execute(query, (*parameters, limit))
+        rows = self.task_cursor.fetchall()
+        if limit < 0 or len(rows) < limit:
+            return rows, None
+        return rows, ("archive", rows[-1].completed_at, rows[-1].id)
+    
+    def iter_tasks(self, include_completed=False, page_size=500):
+        # Streams every task in list order without holding them all in memory
+        cursor = None
+        while True:
+            rows, cursor = self.get_tasks_page(include_completed, cursor, page_size)
+            yield from rows
+            if cursor is None:
+                return
+    
+    def get_task(self, task_id):
+        for table in TASK_TABLES:
+            self.task_cursor.execute(f'''
+            SELECT {TASK_COLUMNS}
+            FROM {table} t
+            JOIN categories c ON t.category_id = c.id
+            WHERE t.id = ?
+            ''', (task_id,))
+            task = self.task_cursor.fetchone()
+            if task:
+                return task
+        return None
+    
+    def get_tasks(self, task_ids):
+        # The tasks among task_ids that still exist, in either table, in no
+        # particular order; rows carry the description preview like list queries
+        task_ids = list(task_ids)
+        tasks = []
+        for table in TASK_TABLES:
+            for i in range(0, len(task_ids), self.MAX_IN_PARAMS):
+                chunk = task_ids[i:i + self.MAX_IN_PARAMS]
+                placeholders = ", ".join("?" * len(chunk))
+                self.task_cursor.execute(f'''
+                SELECT {TASK_LIST_COLUMNS}
+                FROM {table} t
+                JOIN categories c ON t.category_id = c.id
+                WHERE t.id IN ({placeholders})
+                ''', chunk)
+                tasks.extend(self.task_cursor.fetchall())
+        return tasks
+    
+    def get_task_description(self, task_id):
+        # Full description text; list queries only carry a preview
+        for table in TASK_TABLES:
+            self.cursor.execute(f"SELECT description FROM {table} WHERE id = ?", (task_id,))
+            row = self.cursor.fetchone()
+            if row:
+                return row[0] or ""
+        return None
+    
+    def _update_columns(self, title=None, description=None, due_date=None, priority=None, category=None):
+        # Columns and values for an UPDATE, in a fixed order so rows can be batched
+        updates = []
+        parameters = []
+        
+        if title:
+            updates.append("title = ?")
+            parameters.append(title)
+        
+        if description is not None:
+            updates.append("description = ?")
+            parameters.append(description)
+        
+        if due_date is not None:
+            updates.append("due_date = ?")
+            parameters.append(to_epoch_ms(due_date))
+        
+        if priority is not None:
+            updates.append("priority = ?")
+            parameters.append(priority.value)
+        
+        if category:
+            updates.append("category_id = ?")
+            parameters.append(self._get_category_id(category))
+        
+        return updates, parameters
+    
+    def update_task(self, task_id, title=None, description=None, due_date=None, priority=None, category=None):
+        with self.transaction():
+            updates, parameters = self._update_columns(title, description, due_date, priority, category)
+            if updates:
+                parameters.append(task_id)
+                for table in TASK_TABLES:
+                    self.cursor.execute(f"UPDATE {table} SET {', '.join(updates)} WHERE id = ?", parameters)
+                    if self.cursor.rowcount:
+                        self._publish_tasks(TaskUpdated, [task_id], changed=changed_fields(updates))
+                        break
+                return True
+        return False
+    
+    def update_tasks(self, updates):
+        # Bulk update_task: updates is an iterable of (task_id, fields) pairs where
+        # fields holds update_task's keyword arguments. Rows changing the same
+        # columns share one executemany; returns whether each row was updated.
+        updates = list(updates)
+        with self.transaction():
+            existing = self._existing_task_ids(task_id for task_id, _ in updates)
+            # Only ids missing from tasks are looked up in the archive, none usually
+            archived = self._existing_task_ids(
+                (task_id for task_id, _ in updates if task_id not in existing), "tasks_archive"
+            )
+            known = existing | archived
+            batches = {}
+            results = []
+            for task_id, fields in updates:
+                columns, parameters = self._update_columns(**fields)
+                if not columns or task_id not in known:
+                    results.append(False)
+                    continue
+                table = "tasks" if task_id in existing else "tasks_archive"
+                batches.setdefault((table, tuple(columns)), []).append(parameters + [task_id])
+                results.append(True)
+            
+            for (table, columns), rows in batches.items():
+                self.cursor.executemany(f"UPDATE {table} SET {', '.join(columns)} WHERE id = ?", rows)
+                self._publish_tasks(TaskUpdated, [row[-1] for row in rows], changed=changed_fields(columns))
+        return results
+    
+    def complete_task(self, task_id):
+        with self.transaction():
+            self.cursor.execute(
+                "UPDATE tasks SET completed_at = ? WHERE id = ?",
+                (now_epoch_ms(), task_id)
+            )
+            if not self.cursor.rowcount:
+                return False
+            self._publish_tasks(TaskCompleted, [task_id])
+            return True
+    
+    def complete_tasks(self, task_ids):
+        # Bulk complete_task; returns whether each task exists
+        task_ids = list(task_ids)
+        now = now_epoch_ms()
+        with self.transaction():
+            existing = self._existing_task_ids(task_ids)
+            self.cursor.executemany(
+                "UPDATE tasks SET completed_at = ? WHERE id = ?",
+                [(now, task_id) for task_id in task_ids]
+            )
+            self._publish_tasks(TaskCompleted, existing)
+        return [task_id in existing for task_id in task_ids]
+    
+    def uncomplete_task(self, task_id):
+        with self.transaction():
+            self.cursor.execute("UPDATE tasks SET completed_at = NULL WHERE id = ?", (task_id,))
+            if not self.cursor.rowcount:
+                # Archived tasks move back into the tasks table, keeping their id
+                self.cursor.execute(f'''
+                INSERT INTO tasks ({TASK_TABLE_COLUMNS})
+                SELECT id, title, description, created_at, due_date, NULL, priority, category_id
+                FROM tasks_archive WHERE id = ?
+                ''', (task_id,))
+                if not self.cursor.rowcount:
+                    return False
+                self.cursor.execute("DELETE FROM tasks_archive WHERE id = ?", (task_id,))
+            self._publish_tasks(TaskUpdated, [task_id], changed=("completed_at",))
+            return True
+    
+    def delete_task(self, task_id):
+        with self.transaction():
+            for table in TASK_TABLES:
+                self.cursor.execute(f"DELETE FROM {table} WHERE id = ?", (task_id,))
+                if self.cursor.rowcount:
+                    if self.subscribers:
+                        self._events.append(TaskDeleted(task_id))
+                    return True
+        return False
+    
+    def delete_tasks(self, task_ids):
+        # Bulk delete_task; returns whether each task existed
+        task_ids = list(task_ids)
+        with self.transaction():
+            existing = self._existing_task_ids(task_ids)
+            archived = self._existing_task_ids(
+                (task_id for task_id in task_ids if task_id not in existing), "tasks_archive"
+            )
+            self.cursor.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in existing])
+            self.cursor.executemany("DELETE FROM tasks_archive WHERE id = ?", [(task_id,) for task_id in archived])
+            if self.subscribers:
+                self._events.extend(TaskDeleted(task_id) for task_id in existing | archived)
+        return [task_id in existing or task_id in archived for task_id in task_ids]
+    
+    def archive_completed(self, older_than_days=None, batch_size=None, max_batches=None):
+        # Moves tasks completed more than older_than_days (ARCHIVE_AFTER_DAYS) ago
+        # to tasks_archive, oldest first. Each batch is its own transaction, so
+        # other writers get in between; returns the number of tasks moved.
+        if older_than_days is None:
+            older_than_days = self.ARCHIVE_AFTER_DAYS
+        batch_size = batch_size or self.MAX_IN_PARAMS
+        cutoff = now_epoch_ms() - older_than_days * 86_400_000
+        
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self.transaction():
+                self.cursor.execute(
+                    "SELECT id FROM tasks WHERE completed_at < ? ORDER BY completed_at LIMIT ?",
+                    (cutoff, batch_size)
+                )
+                task_ids = [row[0] for row in self.cursor.fetchall()]
+                if task_ids:
+                    placeholders = ", ".join("?" * len(task_ids))
+                    self.cursor.execute(f'''
+                    INSERT INTO tasks_archive ({TASK_TABLE_COLUMNS})
+                    SELECT {TASK_TABLE_COLUMNS} FROM tasks WHERE id IN ({placeholders})
+                    ''', task_ids)
+                    self.cursor.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", task_ids)
+            
+            moved += len(task_ids)
+            batches += 1
+            if len(task_ids) < batch_size:
+                break
+        return moved
+    
+    def get_categories(self):
+        self._sync_categories()
+        return sorted(self.category_names.items(), key=lambda category: category[1])
+    
+    def _search_query(self, query, include_completed, table="tasks"):
+        # SQL and parameters for a search of table (tasks or tasks_archive);
+        # FTS5 ranked by bm25 when available, LIKE otherwise
+        fts_query = build_fts_query(query) if self.has_fts else None
+        status = "" if include_completed else " AND t.completed_at IS NULL"
+        if fts_query is None:
+            search_query = f"%{query}%"
+            return f'''
+            SELECT {TASK_LIST_COLUMNS}
+            FROM {table} t
+            JOIN categories c ON t.category_id = c.id
+            WHERE (t.title LIKE ? OR t.description LIKE ?){status}
+            ORDER BY t.priority DESC, t.due_date ASC
+            ''', (search_query, search_query)
+        
+        # Best matches first, title hits weigh more than description hits
+        return f'''
+        SELECT {TASK_LIST_COLUMNS}
+        FROM {table}_fts f
+        JOIN {table} t ON t.id = f.rowid
+        JOIN categories c ON t.category_id = c.id
+        WHERE {table}_fts MATCH ?{status}
+        ORDER BY bm25({table}_fts, ?, ?)
+        ''', (fts_query, *self.SEARCH_WEIGHTS)
+    
+    def search_tasks(self, query, include_completed=True):
+        # Archived matches follow the live ones
+        tasks = []
+        for table in TASK_TABLES if include_completed else TASK_TABLES[:1]:
+            self.task_cursor.execute(*self._search_query(query, include_completed, table))
+            tasks += self.task_cursor.fetchall()
+        return tasks
+    
+    def filter_tasks(self, expression, include_completed=True):
+        # Runs a filter expression (see parse_filter) as a single query, plus one
+        # over the archive when the expression can match completed tasks
+        now = datetime.datetime.now()
+        terms = parse_filter(expression, now)
+        self.task_cursor.execute(*compile_filter(terms, include_completed, self.has_fts, now))
+        tasks = self.task_cursor.fetchall()
+        
+        statuses = [term for term in terms if isinstance(term, StatusFilter)]
+        open_only = any((term.status != "done") != term.negate for term in statuses)
+        if (include_completed or statuses) and not open_only:
+            self.task_cursor.execute(
+                *compile_filter(terms, include_completed, self.has_fts, now, "tasks_archive")
+            )
+            tasks += self.task_cursor.fetchall()
+        return tasks
+    
+    def iter_search_tasks(self, query, batch_size=500, include_completed=True):
+        # Streams search results in rank order, fetching batch_size rows at a
+        # time; archived matches follow the live ones
+        cursor = self.conn.cursor()
+        cursor.row_factory = Task.from_row
+        try:
+            for table in TASK_TABLES if include_completed else TASK_TABLES[:1]:
+                cursor.execute(*self._search_query(query, include_completed, table))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+        finally:
+            cursor.close()
+    
+    def search_snippets(self, query, limit=20, start="[", end="]"):
+        # Returns (task id, highlighted title, description snippet) for the best
+        # matches; archived matches follow the live ones
+        fts_query = build_fts_query(query) if self.has_fts else None
+        snippets = []
+        for table in TASK_TABLES:
+            remaining = limit - len(snippets)
+            if remaining <= 0:
+                break
+            if fts_query is None:
+                self.task_cursor.execute(*self._search_query(query, True, table))
+                snippets += [
+                    (task.id, task.title, (task.description or "")[:100])
+                    for task in self.task_cursor.fetchmany(remaining)
+                ]
+                continue
+            
+            self.cursor.execute(f'''
+            SELECT rowid,
+                   highlight({table}_fts, 0, ?, ?),
+                   snippet({table}_fts, 1, ?, ?, '…', 12)
+            FROM {table}_fts
+            WHERE {table}_fts MATCH ?
+            ORDER BY bm25({table}_fts, ?, ?)
+            LIMIT ?
+            ''', (start, end, start, end, fts_query, *self.SEARCH_WEIGHTS, remaining))
+            snippets += self.cursor.fetchall()
+        return snippets
+    
+    def get_stats(self):
+        # Everything comes from the trigger-maintained counters
+        counters = self._get_counters()
+        today = datetime.date.today().isoformat()
+        
+        # Open tasks due today
+        self.cursor.execute("SELECT open FROM task_due_days WHERE day = ?", (today,))
+        result = self.cursor.fetchone()
+        due_today = result[0] if result else 0
+        
+        # Open tasks due before today
+        self.cursor.execute("SELECT COALESCE(SUM(open), 0) FROM task_due_days WHERE day < ?", (today,))
+        overdue = self.cursor.fetchone()[0]
+        
+        # Archived tasks still count as completed tasks
+        return {
+            "total": counters["total"] + counters["archived"],
+            "completed": counters["completed"] + counters["archived"],
+            "due_today": due_today,
+            "overdue": overdue
+        }
+    
+    def get_facets(self, include_completed=False):
+        # Task counts per category name, priority and due bucket (DUE_FACETS) from a
+        # single GROUP BY. The result is cached until the next write from any
+        # connection, or until the day changes and the due buckets move.
+        self._sync_categories()
+        today = datetime.date.today()
+        key = (include_completed, today, self._get_data_version(), self.conn.total_changes)
+        if self._facets is not None and self._facets[0] == key:
+            return self._facets[1]
+        
+        days = [
+            to_epoch_ms(datetime.datetime.combine(today + datetime.timedelta(days=offset), datetime.time.min))
+            for offset in (0, 1, 7)
+        ]
+        query = '''
+        SELECT t.category_id, t.priority,
+               CASE WHEN t.due_date IS NULL THEN 'none'
+                    WHEN t.due_date < ? THEN 'past'
+                    WHEN t.due_date < ? THEN 'today'
+                    WHEN t.due_date < ? THEN 'week'
+                    ELSE 'later' END,
+               count(*)
+        '''
+        if include_completed:
+            query += '''
+            FROM (SELECT category_id, priority, due_date FROM tasks
+                  UNION ALL
+                  SELECT category_id, priority, due_date FROM tasks_archive) t
+            '''
+        else:
+            query += " FROM tasks t WHERE t.completed_at IS NULL"
+        query += " GROUP BY 1, 2, 3"
+        self.cursor.execute(query, days)
+        
+        facets = {"category": {}, "priority": {}, "due": {}}
+        for category_id, priority, bucket, count in self.cursor.fetchall():
+            category = self.category_names.get(category_id)
+            facets["category"][category] = facets["category"].get(category, 0) + count
+            facets["priority"][priority] = facets["priority"].get(priority, 0) + count
+            facets["due"][bucket] = facets["due"].get(bucket, 0) + count
+        
+        self._facets = (key, facets)
+        return facets
+    
+    def get_revision(self):
+        # Number of the last change ever logged; it grows with every write to a task.
+        # Its own cursor, as transaction() reads it around the caller's statements.
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'").fetchone()
+        return row[0] if row else 0
+    
+    def get_changes(self, since):
+        # Tasks changed after revision since, as (revision, {task_id: kind}) with
+        # the last kind logged for each task ("insert", "update" or "delete";
+        # moving into or out of the archive is an update).
+        # The dict is None when the log was pruned past since, and the caller
+        # has to reload everything. Polling is cheap: while no connection has
+        # committed (PRAGMA data_version, total_changes), no query runs at all.
+        key = (since, self._get_data_version(), self.conn.total_changes)
+        if key == self._changes_key:
+            return since, {}
+        
+        # The oldest entry comes along to tell whether anything was pruned
+        # (prune_changes always keeps the newest); one statement, one snapshot
+        self.cursor.execute('''
+        SELECT seq, task_id, kind FROM task_changes
+        WHERE seq > ? OR seq = (SELECT MIN(seq) FROM task_changes)
+        ORDER BY seq
+        ''', (since,))
+        rows = self.cursor.fetchall()
+        if rows and rows[0][0] > since + 1:
+            return rows[-1][0], None
+        
+        changes = {task_id: kind for seq, task_id, kind in rows if seq > since}
+        if not changes:
+            self._changes_key = key
+            return since, {}
+        return rows[-1][0], changes
+    
+    def prune_changes(self, older_than_days=None):
+        # Drops old change log entries; get_revision keeps counting from the
+        # sequence. The newest entry always stays, see get_changes.
+        if older_than_days is None:
+            older_than_days = self.CHANGE_LOG_DAYS
+        with self.transaction():
+            return self._delete_old_changes(older_than_days)
+    
+    def _delete_old_changes(self, older_than_days):
+        # Entries are logged in time order, so everything before the first recent
+        # one goes: a rowid range, instead of a scan of the whole log
+        cursor = self.conn.execute('''
+        DELETE FROM task_changes
+        WHERE seq < COALESCE(
+            (SELECT seq FROM task_changes WHERE changed_at >= ? ORDER BY seq LIMIT 1),
+            (SELECT MAX(seq) FROM task_changes)
+        )
+        ''', (now_epoch_ms() - older_than_days * 86_400_000,))
+        return cursor.rowcount
+    
+    def _prune_changes_if_due(self):
+        # The log is pruned by whichever connection logs a multiple of
+        # CHANGE_LOG_PRUNE_EVERY, in that same transaction, so it stays bounded
+        # for the app, the command line and the server alike
+        every = self.CHANGE_LOG_PRUNE_EVERY
+        if self.get_revision() // every != self._begin_revision // every:
+            self._delete_old_changes(self.CHANGE_LOG_DAYS)
+    
+    def check_counters(self, repair=False):
+        # Recounts from the tasks table and returns the differences with the live
+        # counters as {(table, key): (live, expected)}; repair rebuilds them
+        differences = {}
+        for table, query in COUNTER_QUERIES.items():
+            self.cursor.execute(query)
+            expected = {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+            self.cursor.execute(f"SELECT * FROM {table}")
+            live = {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+            for key in expected.keys() | live.keys():
+                if expected.get(key) != live.get(key):
+                    differences[(table, key)] = (live.get(key), expected.get(key))
+        
+        if differences and repair:
+            with self.transaction():
+                rebuild_counters(self.cursor)
+        return differences
+
+# Bounded set of TaskManager connections for threaded front ends (the app's
+# AsyncTaskManager, the HTTP server): writes run in submission order on one
+# writer thread, so they never contend for the lock, and reads on a few reader
+# threads that run concurrently under WAL. Each thread opens its own
+# connection on start, since an sqlite3 connection belongs to one thread.
+class TaskManagerPool:
+    def __init__(self, db_path=None, profile=None, readers=2, name="todo-db"):
+        self.db_path = db_path
+        self.profile = profile
+        self._local = threading.local()
+        self._reader_count = readers
+        self._writer = ThreadPoolExecutor(1, f"{name}-writer", self._open_writer_connection)
+        self._readers = ThreadPoolExecutor(readers, f"{name}-reader", self._open_connection)
+    
+    def _open_connection(self):
+        self._local.manager = TaskManager(self.db_path, self.profile)
+    
+    def _open_writer_connection(self):
+        self._open_connection()
+    
+    def _call(self, method, args, kwargs):
+        return getattr(self._local.manager, method)(*args, **kwargs)
+    
+    def submit_read(self, method, *args, **kwargs):
+        # Runs TaskManager.<method> on a reader connection; returns a Future
+        return self._readers.submit(self._call, method, args, kwargs)
+    
+    def submit_write(self, method, *args, **kwargs):
+        # Runs TaskManager.<method> on the writer connection; returns a Future
+        return self._writer.submit(self._call, method, args, kwargs)
+    
+    def _close_connection(self, barrier=None):
+        # With a barrier every reader thread closes exactly one connection, its
+        # own: none can take a second close while the others still wait
+        if barrier is not None:
+            barrier.wait()
+        self._local.manager.close()
+    
+    def shutdown(self):
+        # Queued calls finish, then every thread closes its connection; the
+        # writer's close checkpoints first
+        self._writer.submit(self._close_connection)
+        self._writer.shutdown(wait=True)
+        barrier = threading.Barrier(self._reader_count)
+        for _ in range(self._reader_count):
+            self._readers.submit(self._close_connection, barrier)
+        self._readers.shutdown(wait=True)
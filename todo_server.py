@@ -0,0 +1,324 @@
+# Local HTTP/JSON API over the task database, for dashboards and editor plugins.
+#
+#   python todo_server.py --port 8765 --readers 4
+#
+#   GET    /tasks?all=1&filter=...&limit=100&after=...   list (paged unless filtered)
+#   GET    /tasks/<id>                                   one task, full description
+#   GET    /search?q=...&all=1&limit=50                  full-text search
+#   GET    /stats                                        get_stats
+#   GET    /facets?all=1                                 get_facets
+#   POST   /tasks                                        add a task, or a list of tasks
+#   PATCH  /tasks/<id>                                   update fields
+#   POST   /tasks/<id>/complete, /tasks/<id>/uncomplete
+#   DELETE /tasks/<id>
+#
+# Tasks use the JSON form of todo_core.task_to_json. GET responses carry an
+# ETag built from the change log revision, so "If-None-Match" requests are
+# answered with 304 without running the query; filters with is:overdue, which
+# change with the time of day, are always run. Requests are served by a
+# bounded pool of connections: one writer thread, so writes never contend for
+# the lock, and a few reader threads that run concurrently under WAL. The
+# server has no authentication and binds to localhost by default.
+import re
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import datetime
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from todo_core import (
+    Priority,
+    StatusFilter,
+    TaskManagerPool,
+    get_storage_profile,
+    parse_filter,
+    task_from_json,
+    task_to_json
+)
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1024 * 1024
+
+# Values page cursors may hold: SQLite integers and priorities
+SQLITE_INTEGERS = range(-2 ** 63, 2 ** 63)
+PRIORITY_VALUES = {priority.value for priority in Priority}
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+# TaskManagerPool awaitable from the event loop
+class ConnectionPool(TaskManagerPool):
+    def __init__(self, db_path=None, profile=None, readers=4):
+        super().__init__(db_path, profile, readers, "todo-server")
+    
+    async def read(self, method, *args, **kwargs):
+        # Runs TaskManager.<method> on a reader connection
+        return await asyncio.wrap_future(self.submit_read(method, *args, **kwargs))
+    
+    async def write(self, method, *args, **kwargs):
+        # Runs TaskManager.<method> on the writer connection, in submission order
+        return await asyncio.wrap_future(self.submit_write(method, *args, **kwargs))
+
+class TodoServer:
+    def __init__(self, pool):
+        self.pool = pool
+        # (method, path pattern, handler, conditional GET)
+        routes = [
+            ("GET", r"/tasks", self.list_tasks, True),
+            ("GET", r"/tasks/(\d+)", self.get_task, True),
+            ("GET", r"/search", self.search_tasks, True),
+            ("GET", r"/stats", self.get_stats, True),
+            ("GET", r"/facets", self.get_facets, True),
+            ("POST", r"/tasks", self.add_tasks, False),
+            ("PATCH", r"/tasks/(\d+)", self.update_task, False),
+            ("POST", r"/tasks/(\d+)/complete", self.complete_task, False),
+            ("POST", r"/tasks/(\d+)/uncomplete", self.uncomplete_task, False),
+            ("DELETE", r"/tasks/(\d+)", self.delete_task, False)
+        ]
+        self.routes = [
+            (method, re.compile(pattern + "$"), handler, conditional)
+            for method, pattern, handler, conditional in routes
+        ]
+    
+    # Handlers get the path groups, the query parameters and the parsed JSON body,
+    # and return (status, payload)
+    async def list_tasks(self, query, body):
+        include_completed = flag(query, "all")
+        limit = integer(query, "limit", 100)
+        if "filter" in query:
+            tasks = await self.pool.read("filter_tasks", query["filter"], include_completed)
+            return HTTPStatus.OK, {"tasks": [task_to_json(task) for task in tasks[:limit]], "next": None}
+        
+        after = page_cursor(query["after"]) if "after" in query else None
+        tasks, cursor = await self.pool.read("get_tasks_page", include_completed, after, limit)
+        return HTTPStatus.OK, {
+            "tasks": [task_to_json(task) for task in tasks],
+            "next": json.dumps(cursor) if cursor else None
+        }
+    
+    async def get_task(self, task_id, query, body):
+        task = await self.pool.read("get_task", int(task_id))
+        if task is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no task {task_id}")
+        return HTTPStatus.OK, task_to_json(task)
+    
+    async def search_tasks(self, query, body):
+        if not query.get("q"):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "q is required")
+        tasks = await self.pool.read("search_tasks", query["q"], flag(query, "all"))
+        return HTTPStatus.OK, {"tasks": [task_to_json(task) for task in tasks[:integer(query, "limit", 50)]]}
+    
+    async def get_stats(self, query, body):
+        return HTTPStatus.OK, await self.pool.read("get_stats")
+    
+    async def get_facets(self, query, body):
+        facets = await self.pool.read("get_facets", flag(query, "all"))
+        # Priorities by name, as in task_to_json; the result is the manager's
+        # cached dict, so it is copied rather than changed
+        priorities = {Priority(key).name.lower(): count for key, count in facets["priority"].items()}
+        return HTTPStatus.OK, {**facets, "priority": priorities}
+    
+    async def add_tasks(self, query, body):
+        tasks = [task_from_json(fields) for fields in (body if isinstance(body, list) else [body])]
+        task_ids = await self.pool.write("add_tasks", tasks)
+        return HTTPStatus.CREATED, {"ids": task_ids}
+    
+    async def update_task(self, task_id, query, body):
+        fields = task_from_json(body, partial=True)
+        if not fields:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "nothing to update")
+        if not (await self.pool.write("update_tasks", [(int(task_id), fields)]))[0]:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no task {task_id}")
+        return await self.get_task(task_id, query, body)
+    
+    async def complete_task(self, task_id, query, body):
+        return await self._change(task_id, "complete_task")
+    
+    async def uncomplete_task(self, task_id, query, body):
+        return await self._change(task_id, "uncomplete_task")
+    
+    async def delete_task(self, task_id, query, body):
+        return await self._change(task_id, "delete_task")
+    
+    async def _change(self, task_id, method):
+        if not await self.pool.write(method, int(task_id)):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no task {task_id}")
+        return HTTPStatus.OK, {"id": int(task_id)}
+    
+    async def etag(self):
+        # Responses change with every logged write, and relative dates
+        # (due today, overdue, due:<+3d) with the day
+        revision = await self.pool.read("get_revision")
+        return f'"{revision}-{datetime.date.today().isoformat()}"'
+    
+    async def dispatch(self, method, target, headers, body):
+        # Returns (status, extra headers, payload)
+        url = urlsplit(target)
+        allowed = False
+        for route_method, pattern, handler, conditional in self.routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            etag = None
+            if conditional and cacheable(query):
+                etag = await self.etag()
+                if etag_matches(headers.get("if-none-match", ""), etag):
+                    return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, None
+            
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "body is not valid JSON")
+            try:
+                status, payload = await handler(*match.groups(), query, data)
+            except ValueError as error:
+                # Bad task fields or filter expressions (FilterError)
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(error))
+            return status, {"ETag": etag} if etag else {}, payload
+        
+        if allowed:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+    
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive; one request at a time per connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                keep_alive = version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                    body = await reader.readexactly(length) if length else b""
+                    status, response_headers, payload = await self.dispatch(method, target, headers, body)
+                except HTTPError as error:
+                    status, response_headers, payload = error.status, {}, {"error": str(error)}
+                except Exception as error:
+                    logger.exception("Request %s %s failed", method, target)
+                    status, response_headers, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {}, {"error": str(error)}
+                
+                self.send(writer, status, response_headers, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    def send(self, writer, status, headers, payload, keep_alive):
+        content = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode()
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if payload is not None:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        lines.append(f"Content-Length: {len(content)}")
+        lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + content)
+
+def cacheable(query):
+    # Responses only change with the revision and the day (see TodoServer.etag),
+    # except for is:overdue, which compares due dates with the current time
+    try:
+        terms = parse_filter(query.get("filter", ""))
+    except ValueError:
+        # The handler answers 400 for it
+        return False
+    return not any(isinstance(term, StatusFilter) and term.status == "overdue" for term in terms)
+
+def etag_matches(header, etag):
+    # If-None-Match is "*" or a comma separated list of tags, weak or not
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or "W/" + etag in tags
+
+def flag(query, name):
+    return query.get(name, "0").lower() in ("1", "true", "yes")
+
+def integer(query, name, default):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a number") from None
+    if value < 1:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be positive")
+    return value
+
+def sqlite_integer(value):
+    return type(value) is int and value in SQLITE_INTEGERS
+
+def page_cursor(value):
+    # The "next" value of a previous page: [priority, due date or null, id], or
+    # ["archive", completed_at, id] once the completed view reached the archive
+    try:
+        after = json.loads(value)
+    except ValueError:
+        after = None
+    if isinstance(after, list) and len(after) == 3:
+        kind, key, task_id = after
+        if kind == "archive":
+            valid = sqlite_integer(key)
+        else:
+            valid = type(kind) is int and kind in PRIORITY_VALUES and (key is None or sqlite_integer(key))
+        if valid and sqlite_integer(task_id):
+            return tuple(after)
+    raise HTTPError(HTTPStatus.BAD_REQUEST, "after must be the next value of a previous page")
+
+async def serve(host, port, pool, ready=None):
+    server = TodoServer(pool)
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    logger.info("Serving on %s", ", ".join(str(sock.getsockname()) for sock in listener.sockets))
+    if ready:
+        ready(listener)
+    async with listener:
+        await listener.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Fancy Todo database over local HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", help="database file (default: ~/.fancy_todo.db)")
+    parser.add_argument("--profile", help="storage profile: durable, balanced or fast")
+    parser.add_argument("--readers", type=int, default=4, help="reader connections in the pool")
+    args = parser.parse_args(argv)
+    try:
+        get_storage_profile(args.profile)
+    except ValueError as error:
+        parser.error(str(error))
+    
+    logging.basicConfig(level=logging.INFO)
+    pool = ConnectionPool(args.db, args.profile, args.readers)
+    try:
+        asyncio.run(serve(args.host, args.port, pool))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())